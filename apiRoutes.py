@@ -0,0 +1,409 @@
+import gzip
+import hashlib
+import json
+import math
+
+from flask import Blueprint, Response, request
+
+from core_algorithms.datasetStore import getDatasetStore
+from core_algorithms.instrumentation import stage
+from core_algorithms.lazyImports import lazyModule
+from core_algorithms.resultCache import getResultCache
+from solverReports import MAX_SENSOR_COUNT_N, MAX_SENSOR_GRID, hullReport, mstReport, proximityReport, routeBetween, sensorReport
+
+coverageAnalyzer = lazyModule('core_algorithms.coverageAnalyzer')
+jobQueue = lazyModule('core_algorithms.jobQueue')
+knapsackSolver = lazyModule('core_algorithms.knapsackSolver')
+scenarioOverlay = lazyModule('core_algorithms.scenarioOverlay')
+shortestPath = lazyModule('core_algorithms.shortestPath')
+timeDependentRouting = lazyModule('core_algorithms.timeDependentRouting')
+zoneGeometry = lazyModule('core_algorithms.zoneGeometry')
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+GZIP_MIN_BYTES = 512
+MAX_SCENARIOS = 64
+MAX_SENSOR_JOB_N = 20
+DEFAULT_COVERAGE_THRESHOLD = 5
+MAX_PROPOSED_SITES = 50
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@api.app_errorhandler(ApiError)
+def handleApiError(error):
+    return buildJsonResponse({'error': error.message}, status=error.status)
+
+
+def readParam(name, cast=str, default=None):
+    payload = request.get_json(silent=True) if request.is_json else None
+    if isinstance(payload, dict) and name in payload:
+        value = payload[name]
+    else:
+        value = request.args.get(name, default)
+
+    if value is None:
+        raise ApiError(f"Missing required parameter '{name}'.")
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise ApiError(f"Invalid value for parameter '{name}'.")
+
+
+def replaceNonFinite(value):
+    # JSON has no Infinity or NaN, so they are sent as null.
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: replaceNonFinite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [replaceNonFinite(item) for item in value]
+    return value
+
+
+def buildJsonResponse(payload, status=200, etag=None):
+    with stage('serialize'):
+        try:
+            body = json.dumps(payload, separators=(',', ':'), default=str, allow_nan=False).encode()
+        except ValueError:
+            body = json.dumps(replaceNonFinite(payload), separators=(',', ':'), default=str, allow_nan=False).encode()
+    response = Response(body, status=status, mimetype='application/json')
+
+    # Weak, because the gzip and identity bodies share the validator.
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+
+    if len(body) >= GZIP_MIN_BYTES and 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response.set_data(gzip.compress(body))
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def cachedJsonResponse(dataset, parts, compute):
+    # The ETag is derived from the dataset content hash and the request
+    # parameters alone, so a matching If-None-Match skips the solver entirely.
+    etag = hashlib.sha1("|".join([dataset.contentHash, request.endpoint] + [str(part) for part in parts]).encode()).hexdigest()
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add('Accept-Encoding')
+        return response
+    with stage('solve'):
+        payload = compute()
+    return buildJsonResponse(payload, etag=etag)
+
+
+@api.route('/dijkstra', methods=['GET', 'POST'])
+def dijkstra():
+    startNode = readParam('start').upper()
+    endNode = readParam('end').upper()
+    dataset = getDatasetStore().get()
+    return cachedJsonResponse(dataset, [startNode, endNode], lambda: routeBetween(dataset, startNode, endNode))
+
+
+def readClockTime(value):
+    return timeDependentRouting.parseClockTime(value)
+
+
+@api.route('/route/timed', methods=['GET', 'POST'])
+def timedRoute():
+    # Fastest route leaving at 'depart' (a number or "HH:MM") under the
+    # network's time-of-day travel-time profiles.
+    startNode = readParam('start').upper()
+    endNode = readParam('end').upper()
+    departure = readParam('depart', readClockTime)
+    dataset = getDatasetStore().get()
+    return cachedJsonResponse(
+        dataset,
+        [startNode, endNode, departure],
+        lambda: timeDependentRouting.solveTimeDependentRoute(dataset.graphIndex, startNode, endNode, departure, dataset.landmarkRouter),
+    )
+
+
+@api.route('/route/profile', methods=['GET', 'POST'])
+def travelTimeProfile():
+    startNode = readParam('start').upper()
+    endNode = readParam('end').upper()
+    step = readParam('step', float, timeDependentRouting.DEFAULT_PROFILE_STEP)
+    start = readParam('from', readClockTime, 0)
+    dataset = getDatasetStore().get()
+    profiles = dataset.graphIndex.profiles
+    end = readParam('to', readClockTime, start + (profiles.period if profiles is not None else timeDependentRouting.DEFAULT_PERIOD))
+
+    def compute():
+        try:
+            return timeDependentRouting.solveTravelTimeProfile(dataset.graphIndex, startNode, endNode, step, start, end)
+        except ValueError as e:
+            raise ApiError(str(e))
+
+    return cachedJsonResponse(dataset, [startNode, endNode, step, start, end], compute)
+
+
+@api.route('/dijkstra/batch', methods=['POST'])
+def dijkstraBatch():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        raise ApiError("Expected a JSON object body.")
+    dataset = getDatasetStore().get()
+
+    if isinstance(payload.get('nodes'), list):
+        nodeList = [str(node).upper() for node in payload['nodes']]
+        if dataset.distanceMatrix is not None:
+            result = dataset.distanceMatrix.lookup(dataset.graphIndex, nodeList)
+        else:
+            result = shortestPath.solveDistanceMatrix(dataset.graphIndex, nodeList)
+        if result['error']:
+            raise ApiError(result['error'])
+        return buildJsonResponse(result)
+
+    pairs = payload.get('pairs')
+    if not isinstance(pairs, list) or any(not isinstance(pair, list) or len(pair) != 2 for pair in pairs):
+        raise ApiError("Expected 'pairs' as a list of [startNode, endNode] or 'nodes' as a list of node ids.")
+
+    pairs = [(str(startNode).upper(), str(endNode).upper()) for startNode, endNode in pairs]
+    return buildJsonResponse({'results': shortestPath.solveDijkstraBatch(dataset.graphIndex, pairs)})
+
+
+@api.route('/knapsack', methods=['GET', 'POST'])
+def knapsack():
+    maxBudget = readParam('budget', int)
+    engine = readParam('engine', str, 'auto')
+    if engine not in ('auto', 'dp', 'branchAndBound'):
+        raise ApiError(f"Unknown knapsack engine: {engine}")
+    dataset = getDatasetStore().get()
+    return cachedJsonResponse(dataset, [maxBudget, engine], lambda: knapsackSolver.solveKnapsackExact(dataset.projects, maxBudget, engine))
+
+
+@api.route('/mst', methods=['GET', 'POST'])
+def mst():
+    dataset = getDatasetStore().get()
+    return cachedJsonResponse(dataset, [], lambda: mstReport(dataset))
+
+
+@api.route('/mst/scenario', methods=['POST'])
+def mstScenario():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        raise ApiError("Expected a JSON object body.")
+    # Same keys as a /scenarios spec, so one edit list works for both.
+    unknownKeys = sorted(str(key) for key in payload if key not in ('addRoads', 'closeRoads'))
+    if unknownKeys:
+        raise ApiError(f"Unknown keys: {', '.join(unknownKeys)}. Expected 'addRoads' and/or 'closeRoads'.")
+    additions = payload.get('addRoads', [])
+    closures = payload.get('closeRoads', [])
+    if not isinstance(additions, list) or any(not isinstance(edge, list) or len(edge) != 3 for edge in additions):
+        raise ApiError("Expected 'addRoads' as a list of [startNode, endNode, cost].")
+    if not isinstance(closures, list) or any(not isinstance(edge, list) or len(edge) != 2 for edge in closures):
+        raise ApiError("Expected 'closeRoads' as a list of [startNode, endNode].")
+
+    dataset = getDatasetStore().get()
+    tree = dataset.dynamicMST.copy()
+    baseCost = tree.cost
+    # Every closure is applied before any addition, so a road added here is
+    # never closed by the same request; 'changes' lists them in that order.
+    changes = []
+    try:
+        for startNode, endNode in closures:
+            changes.append(tree.removeEdge(str(startNode).upper(), str(endNode).upper()))
+        for startNode, endNode, cost in additions:
+            if not isinstance(cost, (int, float)) or isinstance(cost, bool):
+                raise ApiError("Road costs must be numbers.")
+            changes.append(tree.addEdge(str(startNode).upper(), str(endNode).upper(), scenarioOverlay.checkRoadCost(cost)))
+    except ValueError as error:
+        raise ApiError(str(error))
+
+    result = tree.result()
+    result['baseCost'] = baseCost
+    result['costDelta'] = tree.cost - baseCost
+    result['changes'] = changes
+    return buildJsonResponse(result)
+
+
+@api.route('/scenarios', methods=['POST'])
+def scenarios():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        raise ApiError("Expected a JSON object body.")
+    specs = payload.get('scenarios')
+    if not isinstance(specs, list) or not specs:
+        raise ApiError("Expected 'scenarios' as a non-empty list of scenario objects.")
+    if len(specs) > MAX_SCENARIOS:
+        raise ApiError(f"At most {MAX_SCENARIOS} scenarios can be evaluated per request.")
+    routes = payload.get('routes', [])
+    if not isinstance(routes, list) or any(not isinstance(route, list) or len(route) != 2 for route in routes):
+        raise ApiError("Expected 'routes' as a list of [startNode, endNode].")
+    routes = [(str(startNode).upper(), str(endNode).upper()) for startNode, endNode in routes]
+
+    dataset = getDatasetStore().get()
+    try:
+        overlays = [scenarioOverlay.Scenario.fromSpec(dataset.graphIndex, spec) for spec in specs]
+    except ValueError as error:
+        raise ApiError(str(error))
+
+    includeMST = bool(payload.get('mst', True))
+    baseTree = dataset.dynamicMST if includeMST else None
+    return buildJsonResponse({'scenarios': scenarioOverlay.evaluateScenarios(overlays, routes, baseTree, includeMST)})
+
+
+@api.route('/hull', methods=['GET', 'POST'])
+def hull():
+    dataset = getDatasetStore().get()
+    return cachedJsonResponse(dataset, [], lambda: hullReport(dataset))
+
+
+@api.route('/zones', methods=['POST'])
+def zones():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('zones'), dict) or not payload['zones']:
+        raise ApiError("Expected 'zones' as an object mapping zone names to lists of [x, y] points.")
+    queries = payload.get('queries', [])
+    if not isinstance(queries, list):
+        raise ApiError("Expected 'queries' as a list of [x, y] points.")
+
+    try:
+        hulls = zoneGeometry.buildZoneHulls(payload['zones'])
+        located, counts = None, [0] * len(hulls)
+        if queries:
+            located, counts = hulls.locateAndCount(queries)
+            counts = counts.tolist()
+    except (KeyError, TypeError, ValueError):
+        raise ApiError("Points must be [x, y] pairs or objects with numeric 'x' and 'y'.")
+
+    result = {
+        'zones': [
+            {
+                'name': name,
+                'hull': hulls.hull(zone).tolist(),
+                'area': round(float(hulls.areas[zone]), 2),
+                'members': counts[zone],
+            }
+            for zone, name in enumerate(hulls.names)
+        ],
+    }
+    if located is not None:
+        result['locatedZone'] = [hulls.names[zone] if zone >= 0 else None for zone in located.tolist()]
+    return buildJsonResponse(result)
+
+
+@api.route('/sensors', methods=['GET', 'POST'])
+def sensors():
+    n = readParam('n', int)
+    countSolutions = readParam('count', int, 1) != 0
+    if n < 1 or n > MAX_SENSOR_GRID:
+        raise ApiError(f"Parameter 'n' must be between 1 and {MAX_SENSOR_GRID}.")
+    if countSolutions and n > MAX_SENSOR_COUNT_N:
+        raise ApiError(f"Solution counts are limited to n <= {MAX_SENSOR_COUNT_N}; pass count=0.")
+    dataset = getDatasetStore().get()
+    return cachedJsonResponse(dataset, [n, countSolutions], lambda: sensorReport(n, countSolutions))
+
+
+@api.route('/proximity', methods=['GET', 'POST'])
+def proximity():
+    dataset = getDatasetStore().get()
+    return cachedJsonResponse(dataset, [], lambda: proximityReport(dataset))
+
+
+@api.route('/jobs', methods=['POST'])
+def submitJob():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        raise ApiError("Expected a JSON object body.")
+    kind = payload.get('kind')
+    params = payload.get('params', {})
+    timeout = payload.get('timeout')
+    if not isinstance(params, dict):
+        raise ApiError("Expected 'params' as a JSON object.")
+    if timeout is not None and (not isinstance(timeout, (int, float)) or isinstance(timeout, bool)):
+        raise ApiError("Expected 'timeout' as a number of seconds.")
+    if kind == 'sensors':
+        # The planner casts n the same way, so the limit is checked on the
+        # value the job will actually run with.
+        try:
+            params = dict(params, n=int(params.get('n')))
+        except (TypeError, ValueError):
+            raise ApiError("Expected 'n' as an integer.")
+        if params['n'] > MAX_SENSOR_JOB_N:
+            raise ApiError(f"Sensor count jobs are limited to n <= {MAX_SENSOR_JOB_N}.")
+
+    try:
+        job = jobQueue.getJobQueue().submit(kind, params, getDatasetStore().get(), timeout)
+    except ValueError as error:
+        raise ApiError(str(error))
+    response = buildJsonResponse(job.toDict(), status=202)
+    response.headers['Location'] = f"{api.url_prefix}/jobs/{job.id}"
+    return response
+
+
+@api.route('/jobs', methods=['GET'])
+def listJobs():
+    return buildJsonResponse({'jobs': jobQueue.getJobQueue().listJobs()})
+
+
+def findJob(jobId):
+    job = jobQueue.getJobQueue().get(jobId)
+    if job is None:
+        raise ApiError(f"Unknown job: {jobId}", status=404)
+    return job
+
+
+@api.route('/jobs/<jobId>', methods=['GET'])
+def jobStatus(jobId):
+    return buildJsonResponse(findJob(jobId).toDict())
+
+
+@api.route('/jobs/<jobId>/result', methods=['GET'])
+def jobResult(jobId):
+    job = findJob(jobId)
+    if job.status != jobQueue.DONE:
+        raise ApiError(f"Job {jobId} is {job.status}; no result is available.", status=409)
+    return buildJsonResponse(job.toDict(includeResult=True))
+
+
+@api.route('/jobs/<jobId>', methods=['DELETE'])
+def cancelJob(jobId):
+    jobQueue.getJobQueue().cancel(jobId)
+    return buildJsonResponse(findJob(jobId).toDict())
+
+
+@api.route('/coverage', methods=['GET', 'POST'])
+def coverage():
+    threshold = readParam('threshold', float, DEFAULT_COVERAGE_THRESHOLD)
+    k = readParam('k', int, 0)
+    method = readParam('method', str, 'lazy')
+    facilities = readParam('facilities', str, '')
+    if threshold < 0:
+        raise ApiError("Parameter 'threshold' must be non-negative.")
+    if not 0 <= k <= MAX_PROPOSED_SITES:
+        raise ApiError(f"Parameter 'k' must be between 0 and {MAX_PROPOSED_SITES}.")
+    if method not in ('lazy', 'greedy'):
+        raise ApiError(f"Unknown site selection method: {method}")
+
+    dataset = getDatasetStore().get()
+    facilityIds = [nodeId.strip().upper() for nodeId in facilities.split(',') if nodeId.strip()]
+    invalidNodes = [nodeId for nodeId in facilityIds if nodeId not in dataset.graphIndex.nodeIndex]
+    if invalidNodes:
+        raise ApiError(f"Invalid Node ({', '.join(invalidNodes)})")
+
+    def compute():
+        # The dataset's own facilities share one analysis per snapshot; an
+        # explicit facility list gets a throwaway one.
+        if facilityIds:
+            analysis = coverageAnalyzer.CoverageAnalysis(dataset.graphIndex, [dataset.graphIndex.nodeIndex[nodeId] for nodeId in facilityIds])
+        else:
+            analysis = dataset.facilityCoverage
+        return analysis.report(threshold, k, lazy=method == 'lazy')
+
+    return cachedJsonResponse(dataset, [threshold, k, method, ','.join(facilityIds)], compute)
+
+
+@api.route('/cache', methods=['GET'])
+def cacheStats():
+    return buildJsonResponse(getResultCache().stats())
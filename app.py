@@ -1,117 +1,153 @@
-from flask import Flask, render_template, request
-import json
-
-from core_algorithms.shortestPath import solveDijkstra
-from core_algorithms.knapsackSolver import solveKnapsack
-from core_algorithms.mstBuilder import buildMST
-from core_algorithms.convexHullBuilder import buildConvexHull
-from core_algorithms.nQueenPlacement import findSensorPlacement 
-from core_algorithms.closestPairSolver import findClosestPair, loadProximityData
-
-app = Flask(__name__)
-
-def loadNetworkData():
-    with open('data/city_network.json') as f:
-        data = json.load(f)
-    return data
-
-def loadProjectsData():
-    with open('data/projects.json') as f:
-        return json.load(f)
-
-def loadCoordinatesData():
-    with open('data/coordinates.json') as f:
-        return json.load(f)
-
-def loadNetworkEdgesForDisplay():
-    with open('data/city_network.json') as f:
-        data = json.load(f)
-    
-    formatted_edges = [f"{u} <--> {v} (Cost: {w})" for u, v, w in data['edges']]
-    return formatted_edges
+import os
+import time
 
+from flask import Flask, jsonify, request
 
-def getRenderContext(activeResultKey=None, activeResultValue=None):
-    emergency_points, underserved_points = loadProximityData()
-    
-    networkData = loadNetworkData()
-    networkNodes = [{'id': node['id'], 'name': node['name']} for node in networkData['nodes']]
-    
-    all_network_edges = loadNetworkEdgesForDisplay()
-    
-    context = {
-        'networkNodes': networkNodes,
-        'all_network_edges': all_network_edges,
-        'emergency_points': emergency_points,
-        'underserved_points': underserved_points,
-        'dijkstraResult': None,
-        'knapsackResult': None,
-        'mstResult': None,
-        'hullResult': None,
-        'sensorResult': None,
-        'proximityResult': None,
-    }
-    
-    if activeResultKey:
-        context[activeResultKey] = activeResultValue
-        
-    return context
+from core_algorithms.datasetStore import getDatasetStore
+from core_algorithms.instrumentation import stage
+from core_algorithms.lazyImports import lazyModule, loadRegisteredModules
+from core_algorithms.resultCache import getResultCache
+from pageRenderer import getPageShell, homePageResponse, renderResultPage
+from requestMetrics import installInstrumentation
+from apiRoutes import api, dijkstraBatch
+from solverReports import MAX_SENSOR_COUNT_N, MAX_SENSOR_GRID, hullReport, mstReport, proximityReport, routeBetween, sensorReport
+
+knapsackSolver = lazyModule('core_algorithms.knapsackSolver')
+
+WARMUP_ENV = 'URBAN_PLANNER_WARMUP'
+
+def invalidateResults(snapshot):
+    getResultCache().invalidate(snapshot.contentHash)
+
+def loadDataset():
+    with stage('load'):
+        return getDatasetStore().get()
+
+
+def renderPage(activeResultKey=None, activeResultValue=None, dataset=None):
+    if dataset is None:
+        dataset = loadDataset()
+    return renderResultPage(dataset, activeResultKey, activeResultValue)
 
 
-@app.route('/')
 def home():
-    return render_template('index.html', **getRenderContext())
+    return homePageResponse(loadDataset())
 
 
-@app.route('/solve-dijkstra', methods=['POST'])
 def handleDijkstra():
     startNode = request.form['startNode'].upper()
     endNode = request.form['endNode'].upper()
-    graph = loadNetworkData()
-    result = solveDijkstra(graph, startNode, endNode)
-    return render_template('index.html', **getRenderContext('dijkstraResult', result))
+    dataset = loadDataset()
+    with stage('solve'):
+        result = routeBetween(dataset, startNode, endNode)
+    return renderPage('dijkstraResult', result, dataset)
 
-@app.route('/solve-knapsack', methods=['POST'])
 def handleKnapsack():
     try:
         maxBudget = int(request.form['maxBudget'])
     except ValueError:
         maxBudget = 0
-    projects = loadProjectsData()
-    result = solveKnapsack(projects, maxBudget)
-    return render_template('index.html', **getRenderContext('knapsackResult', result))
+    dataset = loadDataset()
+    with stage('solve'):
+        result = knapsackSolver.solveKnapsackExact(dataset.projects, maxBudget)
+    return renderPage('knapsackResult', result, dataset)
+
+def handleBudgetSweep():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        payload = {}
+    dataset = loadDataset()
+    
+    try:
+        with stage('solve'):
+            if isinstance(payload.get('limits'), dict):
+                result = knapsackSolver.solveMultiConstraintKnapsack(dataset.projects, payload['limits'])
+            else:
+                result = knapsackSolver.solveBudgetSweep(dataset.projects, int(payload['maxBudget']), payload.get('budgets'))
+        return jsonify(result)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f"Invalid budget sweep request: {e}"}), 400
 
-@app.route('/solve-mst', methods=['POST'])
 def handleMST():
-    graph = loadNetworkData()
-    result = buildMST(graph)
-    return render_template('index.html', **getRenderContext('mstResult', result))
+    dataset = loadDataset()
+    with stage('solve'):
+        result = mstReport(dataset)
+    return renderPage('mstResult', result, dataset)
 
-@app.route('/solve-hull', methods=['POST'])
 def handleHull():
-    points = loadCoordinatesData()
-    result = buildConvexHull(points)
-    return render_template('index.html', **getRenderContext('hullResult', result))
+    dataset = loadDataset()
+    with stage('solve'):
+        result = hullReport(dataset)
+    return renderPage('hullResult', result, dataset)
 
-@app.route('/solve-sensors', methods=['POST'])
 def handleSensorPlacement():
     try:
         n = int(request.form['numSensors'])
     except ValueError:
         n = 0
         
-    if n > 14 or n < 1:
-        result = {'n': n, 'success': False, 'coordinates': [], 'count': 0, 'visualGrid': "Input N must be between 1 and 14 for stable calculation."}
-        return render_template('index.html', **getRenderContext('sensorResult', result))
+    if n > MAX_SENSOR_GRID or n < 1:
+        result = {'n': n, 'success': False, 'coordinates': [], 'count': 0, 'visualGrid': f"Input N must be between 1 and {MAX_SENSOR_GRID}."}
+        return renderPage('sensorResult', result)
         
-    result = findSensorPlacement(n)
-    return render_template('index.html', **getRenderContext('sensorResult', result))
+    with stage('solve'):
+        result = sensorReport(n, n <= MAX_SENSOR_COUNT_N)
+    return renderPage('sensorResult', result)
 
-@app.route('/check-proximity', methods=['POST'])
 def handleProximityChecker():
-    emergency_points, underserved_points = loadProximityData()
-    result = findClosestPair(emergency_points)
-    return render_template('index.html', **getRenderContext('proximityResult', result))
+    dataset = loadDataset()
+    with stage('solve'):
+        result = proximityReport(dataset)
+    return renderPage('proximityResult', result, dataset)
+
+
+def warmUp(app):
+    # Loads the dataset, builds the structures most pages touch, imports
+    # every lazily registered solver module and renders the page shell, so
+    # none of that lands in the first user's request.
+    started = time.perf_counter()
+    with stage('warmup'):
+        dataset = getDatasetStore().get()
+        dataset.graphIndex.csrLists()
+        dataset.networkNodes
+        dataset.formattedEdges
+        dataset.proximityPoints
+        dataset.proximityIndex
+        loadRegisteredModules()
+        with app.test_request_context('/'):
+            getPageShell(dataset)
+    return time.perf_counter() - started
+
+
+def createApp(warm=None):
+    # warm defaults to the URBAN_PLANNER_WARMUP environment variable. Under
+    # gunicorn --preload, warming in the master shares the loaded dataset and
+    # imported modules with every forked worker.
+    app = Flask(__name__)
+
+    app.register_blueprint(api)
+    installInstrumentation(app)
+
+    app.add_url_rule('/', view_func=home)
+    app.add_url_rule('/solve-dijkstra', view_func=handleDijkstra, methods=['POST'])
+    app.add_url_rule('/solve-dijkstra-batch', view_func=dijkstraBatch, methods=['POST'])
+    app.add_url_rule('/solve-knapsack', view_func=handleKnapsack, methods=['POST'])
+    app.add_url_rule('/solve-budget-sweep', view_func=handleBudgetSweep, methods=['POST'])
+    app.add_url_rule('/solve-mst', view_func=handleMST, methods=['POST'])
+    app.add_url_rule('/solve-hull', view_func=handleHull, methods=['POST'])
+    app.add_url_rule('/solve-sensors', view_func=handleSensorPlacement, methods=['POST'])
+    app.add_url_rule('/check-proximity', view_func=handleProximityChecker, methods=['POST'])
+
+    getDatasetStore().addReloadListener(invalidateResults)
+
+    if warm is None:
+        warm = os.environ.get(WARMUP_ENV) == '1'
+    if warm:
+        app.config['WARMUP_SECONDS'] = warmUp(app)
+    return app
+
+
+app = createApp()
 
 
 if __name__ == '__main__':
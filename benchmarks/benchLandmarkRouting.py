@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core_algorithms.graphIndex import buildGraphIndex
+from core_algorithms.landmarkRouter import buildLandmarkRouter
+from core_algorithms.shortestPath import solveDijkstra
+from benchmarks.syntheticCity import buildGridNetwork
+
+
+def timeQueries(solve, pairs):
+    started = time.perf_counter()
+    results = [solve(startNode, endNode) for startNode, endNode in pairs]
+    return time.perf_counter() - started, results
+
+
+def redrawWeights(graph, mode, seed):
+    # Float and zero-cost roads are where ALT paths can drift from
+    # solveDijkstra on ties, so the mismatch check can be run on them too.
+    rng = random.Random(seed)
+    for edge in graph['edges']:
+        if mode == 'float':
+            edge[2] = round(rng.uniform(0.1, 20), rng.choice((1, 2, 6)))
+        elif mode == 'zero' and rng.random() < 0.05:
+            edge[2] = 0
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ALT landmark routing against solveDijkstra.")
+    parser.add_argument('--network', default='data/city_network.json')
+    parser.add_argument('--grid', type=int, default=0, help="benchmark a seeded SIDE x SIDE grid instead of --network")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--landmarks', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--weights', choices=('network', 'float', 'zero'), default='network',
+                        help="redraw edge weights as floats, or zero out some of them")
+    args = parser.parse_args()
+
+    if args.grid:
+        graph = buildGridNetwork(args.grid, args.seed)
+    else:
+        with open(args.network) as f:
+            graph = json.load(f)
+    if args.weights != 'network':
+        graph = redrawWeights(graph, args.weights, args.seed)
+
+    index = buildGraphIndex(graph)
+    started = time.perf_counter()
+    router = buildLandmarkRouter(index, args.landmarks)
+    buildSeconds = time.perf_counter() - started
+
+    rng = random.Random(args.seed)
+    pairs = [(rng.choice(index.nodeIds), rng.choice(index.nodeIds)) for _ in range(args.queries)]
+
+    dijkstraSeconds, expected = timeQueries(lambda s, t: solveDijkstra(index, s, t), pairs)
+    landmarkSeconds, actual = timeQueries(router.solve, pairs)
+    mismatches = sum(1 for a, b in zip(expected, actual) if a != b)
+
+    print(f"nodes={index.numNodes} edges={index.numEdges} landmarks={len(router.landmarks)} preprocessing={buildSeconds:.3f}s")
+    print(f"dijkstra: {dijkstraSeconds / len(pairs) * 1000:.3f} ms/query")
+    print(f"landmark: {landmarkSeconds / len(pairs) * 1000:.3f} ms/query")
+    print(f"speedup:  {dijkstraSeconds / landmarkSeconds:.2f}x  mismatches={mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core_algorithms.spatialIndex import SpatialIndex
+
+
+def bruteForceClosestPair(points):
+    best = (float('inf'), None, None)
+    for i in range(len(points)):
+        delta = points[i + 1:] - points[i]
+        if len(delta) == 0:
+            continue
+        distances = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+        j = int(np.argmin(distances))
+        if distances[j] < best[0]:
+            best = (float(distances[j]), i, i + 1 + j)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark for the KD-tree spatial index.")
+    parser.add_argument('--min-exponent', type=int, default=2)
+    parser.add_argument('--max-exponent', type=int, default=6)
+    parser.add_argument('--brute-limit', type=int, default=10_000, help="largest size also timed with the O(n^2) scan")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'points':>9} {'build':>9} {'pair':>9} {'knn(k=5)':>9} {'radius':>9} {'brute':>9}")
+    for exponent in range(args.min_exponent, args.max_exponent + 1):
+        size = 10 ** exponent
+        points = rng.uniform(0, 1000, size=(size, 2))
+        queries = rng.uniform(0, 1000, size=(min(size, 10_000), 2))
+
+        started = time.perf_counter()
+        index = SpatialIndex(points)
+        built = time.perf_counter()
+        pair = index.closestPair()
+        paired = time.perf_counter()
+        index.nearest(queries, k=5)
+        nearest = time.perf_counter()
+        index.withinRadius(queries, 1000 / np.sqrt(size))
+        radius = time.perf_counter()
+
+        bruteColumn = '-'
+        if size <= args.brute_limit:
+            bruteStarted = time.perf_counter()
+            distance, first, second = bruteForceClosestPair(points)
+            bruteColumn = f"{time.perf_counter() - bruteStarted:8.3f}s"
+            if abs(distance - pair[2]) > 1e-9:
+                print(f"closest pair mismatch at n={size}: {pair} vs {(first, second, distance)}")
+                return 1
+
+        print(f"{size:>9} {built - started:8.3f}s {paired - built:8.3f}s {nearest - paired:8.3f}s {radius - nearest:8.3f}s {bruteColumn:>9}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
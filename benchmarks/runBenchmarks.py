@@ -0,0 +1,232 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core_algorithms.closestPairSolver import buildProximityPoints, findClosestPair
+from core_algorithms.convexHullBuilder import buildConvexHull
+from core_algorithms.graphIndex import buildGraphIndex
+from core_algorithms.knapsackSolver import DP_CELL_LIMIT, solveKnapsack, solveKnapsackExact
+from core_algorithms.mstBuilder import buildMST
+from core_algorithms.nQueenPlacement import countNQueens, solveNQueens
+from core_algorithms.shortestPath import solveDijkstra
+from core_algorithms.timeDependentRouting import solveTimeDependentRoute, solveTravelTimeProfile
+from benchmarks.syntheticCity import addTravelTimeProfiles, buildClusteredCoordinates, buildGeometricNetwork, buildGridNetwork, buildProjectPortfolio
+
+RESULT_FORMAT_VERSION = 1
+ROUTE_QUERIES = 20
+PROFILE_QUERIES = 2
+PROFILE_STEP = 60
+MIN_MEMORY_DELTA_BYTES = 1 << 16
+
+# Each case maps a problem size to (run, operations): setup happens outside
+# the timed region, and ops/sec counts the operations one run performs.
+
+
+def setupDijkstraGrid(size, seed):
+    index = buildGraphIndex(buildGridNetwork(int(round(size ** 0.5)), seed))
+    rng = random.Random(seed)
+    pairs = [(rng.choice(index.nodeIds), rng.choice(index.nodeIds)) for _ in range(ROUTE_QUERIES)]
+    return lambda: [solveDijkstra(index, startNode, endNode) for startNode, endNode in pairs], len(pairs)
+
+
+def setupDijkstraGeometric(size, seed):
+    index = buildGraphIndex(buildGeometricNetwork(size, seed))
+    rng = random.Random(seed)
+    pairs = [(rng.choice(index.nodeIds), rng.choice(index.nodeIds)) for _ in range(ROUTE_QUERIES)]
+    return lambda: [solveDijkstra(index, startNode, endNode) for startNode, endNode in pairs], len(pairs)
+
+
+def setupTimeDependentRoute(size, seed):
+    index = buildGraphIndex(addTravelTimeProfiles(buildGeometricNetwork(size, seed), seed))
+    rng = random.Random(seed)
+    queries = [(rng.choice(index.nodeIds), rng.choice(index.nodeIds), rng.uniform(0, 1440)) for _ in range(ROUTE_QUERIES)]
+    return lambda: [solveTimeDependentRoute(index, startNode, endNode, departure) for startNode, endNode, departure in queries], len(queries)
+
+
+def setupTravelTimeProfile(size, seed):
+    index = buildGraphIndex(addTravelTimeProfiles(buildGeometricNetwork(size, seed), seed))
+    rng = random.Random(seed)
+    pairs = [(rng.choice(index.nodeIds), rng.choice(index.nodeIds)) for _ in range(PROFILE_QUERIES)]
+    return lambda: [solveTravelTimeProfile(index, startNode, endNode, PROFILE_STEP) for startNode, endNode in pairs], len(pairs)
+
+
+def setupMST(size, seed):
+    index = buildGraphIndex(buildGeometricNetwork(size, seed))
+    return lambda: buildMST(index), 1
+
+
+def setupMSTFromDict(size, seed):
+    graph = buildGeometricNetwork(size, seed)
+    return lambda: buildMST(graph), 1
+
+
+def setupKnapsackGreedy(size, seed):
+    projects = buildProjectPortfolio(size, seed)
+    budget = sum(project['cost'] for project in projects) // 4
+    return lambda: solveKnapsack(projects, budget), 1
+
+
+def setupKnapsackExact(size, seed):
+    projects = buildProjectPortfolio(size, seed)
+    # Capped so the table stays within DP_CELL_LIMIT; otherwise auto would
+    # fall back to branch and bound, which has no node limit.
+    budget = min(sum(project['cost'] for project in projects) // 4, DP_CELL_LIMIT // size - 1)
+    return lambda: solveKnapsackExact(projects, budget, engine='dp'), 1
+
+
+def setupConvexHull(size, seed):
+    coordinates = buildClusteredCoordinates(size, seed)
+    return lambda: buildConvexHull(coordinates), 1
+
+
+def setupClosestPair(size, seed):
+    points, _ = buildProximityPoints(buildClusteredCoordinates(size, seed))
+    return lambda: findClosestPair(points), 1
+
+
+def setupNQueensEnumerate(size, seed):
+    return lambda: solveNQueens(size), 1
+
+
+def setupNQueensCount(size, seed):
+    return lambda: countNQueens(size, workers=1), 1
+
+
+CASES = {
+    'dijkstra.grid': (setupDijkstraGrid, {'quick': [1_000, 10_000], 'full': [1_000, 10_000, 100_000]}),
+    'dijkstra.geometric': (setupDijkstraGeometric, {'quick': [1_000, 10_000], 'full': [1_000, 10_000, 100_000]}),
+    'timeDependent.route': (setupTimeDependentRoute, {'quick': [1_000, 10_000], 'full': [1_000, 10_000, 100_000]}),
+    'timeDependent.profile': (setupTravelTimeProfile, {'quick': [1_000, 10_000], 'full': [1_000, 10_000, 100_000]}),
+    'mst.index': (setupMST, {'quick': [1_000, 10_000], 'full': [1_000, 10_000, 100_000]}),
+    'mst.dict': (setupMSTFromDict, {'quick': [1_000, 10_000], 'full': [1_000, 10_000, 100_000]}),
+    'knapsack.greedy': (setupKnapsackGreedy, {'quick': [1_000, 10_000], 'full': [1_000, 10_000, 100_000]}),
+    'knapsack.exact': (setupKnapsackExact, {'quick': [100, 500], 'full': [100, 500, 2_000]}),
+    'hull': (setupConvexHull, {'quick': [1_000, 10_000], 'full': [1_000, 10_000, 100_000, 1_000_000]}),
+    'closestPair': (setupClosestPair, {'quick': [1_000, 10_000], 'full': [1_000, 10_000, 100_000, 1_000_000]}),
+    'nqueens.enumerate': (setupNQueensEnumerate, {'quick': [6, 8], 'full': [6, 8, 10]}),
+    'nqueens.count': (setupNQueensCount, {'quick': [8, 10], 'full': [8, 10, 12]}),
+}
+
+
+def measure(run, repeats):
+    timings = []
+    for _ in range(repeats):
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+
+    # Peak memory is taken from a separate untimed run, since tracing
+    # allocations slows the solver down noticeably.
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peakBytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return min(timings), peakBytes
+
+
+def runSuite(caseNames, profile, seed, repeats, log=print):
+    results = []
+    for name in caseNames:
+        setup, sizes = CASES[name]
+        for size in sizes[profile]:
+            run, operations = setup(size, seed)
+            seconds, peakBytes = measure(run, repeats)
+            result = {
+                'case': name,
+                'size': size,
+                'seconds': round(seconds, 6),
+                'peakBytes': peakBytes,
+                'opsPerSec': round(operations / seconds, 3) if seconds > 0 else None,
+            }
+            results.append(result)
+            log(f"{name:<20} {size:>9} {seconds * 1000:11.2f} ms {peakBytes / 1e6:9.2f} MB {result['opsPerSec'] or 0:12.1f} ops/s")
+    return results
+
+
+def compareToBaseline(results, baseline, tolerance, memoryTolerance, minDeltaMs):
+    # A case regresses when it is slower (or hungrier) than the baseline by
+    # more than the tolerance; the absolute floors keep jitter on tiny cases
+    # from failing the run.
+    baselineResults = {(entry['case'], entry['size']): entry for entry in baseline['results']}
+    regressions = []
+    for result in results:
+        previous = baselineResults.get((result['case'], result['size']))
+        if previous is None:
+            continue
+        slowdown = result['seconds'] / previous['seconds'] if previous['seconds'] else 1.0
+        deltaMs = (result['seconds'] - previous['seconds']) * 1000
+        if slowdown > 1 + tolerance and deltaMs > minDeltaMs:
+            regressions.append(f"{result['case']} n={result['size']}: {previous['seconds'] * 1000:.2f} ms -> {result['seconds'] * 1000:.2f} ms ({slowdown:.2f}x)")
+        growth = result['peakBytes'] / previous['peakBytes'] if previous['peakBytes'] else 1.0
+        if growth > 1 + memoryTolerance and result['peakBytes'] - previous['peakBytes'] > MIN_MEMORY_DELTA_BYTES:
+            regressions.append(f"{result['case']} n={result['size']}: peak memory {previous['peakBytes'] / 1e6:.2f} MB -> {result['peakBytes'] / 1e6:.2f} MB ({growth:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmarks for every core_algorithms solver on seeded synthetic cities.")
+    parser.add_argument('--profile', choices=('quick', 'full'), default='quick')
+    parser.add_argument('--case', action='append', choices=sorted(CASES), help="run only this case (repeatable)")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', default='benchmarks/results/latest.json')
+    parser.add_argument('--baseline', default=None, help="fail if the run regresses against this results file")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument('--memory-tolerance', type=float, default=0.25, help="allowed relative peak memory growth")
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    caseNames = args.case or list(CASES)
+    print(f"{'case':<20} {'size':>9} {'time':>14} {'peak':>12} {'throughput':>18}")
+    results = runSuite(caseNames, args.profile, args.seed, args.repeats)
+
+    report = {
+        'formatVersion': RESULT_FORMAT_VERSION,
+        'createdAt': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'profile': args.profile,
+        'seed': args.seed,
+        'repeats': args.repeats,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.platform(),
+        'results': results,
+    }
+    outputDir = os.path.dirname(args.output)
+    if outputDir:
+        os.makedirs(outputDir, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('seed') != args.seed:
+            print(f"warning: baseline used seed {baseline.get('seed')}, this run used {args.seed}")
+        regressions = compareToBaseline(results, baseline, args.tolerance, args.memory_tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
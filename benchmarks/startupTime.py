@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each run is a fresh interpreter, as an autoscaled worker would be: it times
+# importing the app (which builds it through createApp), the optional
+# warm-up, and the first request a user would send.
+CHILD = r"""
+import json, os, sys, time
+started = time.perf_counter()
+import app as appModule
+imported = time.perf_counter()
+application = appModule.createApp(warm=True) if sys.argv[1] == 'warm' else appModule.app
+ready = time.perf_counter()
+modulesAtReady = len(sys.modules)
+scipyAtReady = 'scipy' in sys.modules
+client = application.test_client()
+response = client.open(sys.argv[2], method=sys.argv[3], data=json.loads(sys.argv[4]))
+finished = time.perf_counter()
+print(json.dumps({
+    'importMs': (imported - started) * 1000,
+    'warmupMs': (ready - imported) * 1000,
+    'firstRequestMs': (finished - ready) * 1000,
+    'readyMs': (ready - started) * 1000,
+    'status': response.status_code,
+    'modules': modulesAtReady,
+    'scipyLoaded': scipyAtReady,
+}))
+"""
+
+REQUESTS = {
+    'home': ('/', 'GET', {}),
+    'route': ('/solve-dijkstra', 'POST', {'startNode': 'N1', 'endNode': 'N50'}),
+    'proximity': ('/check-proximity', 'POST', {}),
+}
+
+
+def runChild(mode, requestName):
+    path, method, form = REQUESTS[requestName]
+    environment = dict(os.environ, PYTHONPATH=ROOT, URBAN_PLANNER_WARMUP='0', URBAN_PLANNER_PROFILING='0')
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, mode, path, method, json.dumps(form)],
+        cwd=ROOT, env=environment, check=True, capture_output=True, text=True,
+    ).stdout
+    # Wall time of the whole process also covers interpreter start-up and exit.
+    run = json.loads(output.strip().splitlines()[-1])
+    run['processMs'] = (time.perf_counter() - started) * 1000
+    return run
+
+
+def summarize(runs, key):
+    values = [run[key] for run in runs]
+    return {'min': round(min(values), 3), 'median': round(statistics.median(values), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the app in fresh interpreters.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--request', choices=sorted(REQUESTS), default='home', help="first request sent after startup")
+    parser.add_argument('--output', default=None, help="also write the summary as JSON")
+    args = parser.parse_args()
+
+    report = {'runs': args.runs, 'request': args.request, 'modes': {}}
+    print(f"{'mode':<6} {'import':>12} {'warm-up':>12} {'first request':>15} {'import to response':>20} {'process':>12} {'modules':>8}")
+    for mode in ('cold', 'warm'):
+        runs = [runChild(mode, args.request) for _ in range(args.runs)]
+        summary = {key: summarize(runs, key) for key in ('importMs', 'warmupMs', 'firstRequestMs', 'readyMs', 'processMs')}
+        totals = [run['readyMs'] + run['firstRequestMs'] for run in runs]
+        summary['totalMs'] = {'min': round(min(totals), 3), 'median': round(statistics.median(totals), 3)}
+        summary['modules'] = runs[-1]['modules']
+        summary['scipyLoadedAtStartup'] = runs[-1]['scipyLoaded']
+        report['modes'][mode] = summary
+        print(f"{mode:<6} {summary['importMs']['median']:>10.1f}ms {summary['warmupMs']['median']:>10.1f}ms "
+              f"{summary['firstRequestMs']['median']:>13.1f}ms {summary['totalMs']['median']:>18.1f}ms "
+              f"{summary['processMs']['median']:>10.1f}ms {summary['modules']:>8}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
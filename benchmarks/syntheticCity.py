@@ -0,0 +1,109 @@
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core_algorithms.mstBuilder import ArrayUnionFind
+
+# Seeded generators for datasets shaped like the files in data/, so every
+# solver can be timed well beyond the bundled 50-node city.
+
+
+def buildGridNetwork(side, seed):
+    rng = random.Random(seed)
+    nodes = [{'id': f"G{row}_{col}", 'name': f"Grid {row},{col}"} for row in range(side) for col in range(side)]
+    edges = []
+    for row in range(side):
+        for col in range(side):
+            if col + 1 < side:
+                edges.append([f"G{row}_{col}", f"G{row}_{col + 1}", rng.randint(1, 20)])
+            if row + 1 < side:
+                edges.append([f"G{row}_{col}", f"G{row + 1}_{col}", rng.randint(1, 20)])
+    return {'nodes': nodes, 'edges': edges}
+
+
+def buildGeometricNetwork(numNodes, seed, averageDegree=6, extent=1000.0):
+    # Random geometric graph: nodes scattered uniformly, joined when closer
+    # than a radius picked for the requested average degree. Leftover
+    # components are chained together so every node is reachable.
+    rng = random.Random(seed)
+    points = [(rng.uniform(0, extent), rng.uniform(0, extent)) for _ in range(numNodes)]
+    radius = math.sqrt(averageDegree * extent * extent / (math.pi * max(numNodes, 1)))
+
+    buckets = {}
+    for i, (x, y) in enumerate(points):
+        buckets.setdefault((int(x // radius), int(y // radius)), []).append(i)
+
+    nodes = [{'id': f"R{i}", 'name': f"Junction {i}"} for i in range(numNodes)]
+    edges = []
+    uf = ArrayUnionFind(numNodes)
+    for (cellX, cellY), members in buckets.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in buckets.get((cellX + dx, cellY + dy), ()):
+                    for i in members:
+                        if i < j:
+                            distance = math.dist(points[i], points[j])
+                            if distance <= radius:
+                                edges.append([f"R{i}", f"R{j}", max(1, round(distance))])
+                                uf.union(i, j)
+
+    roots = sorted({uf.find(i) for i in range(numNodes)}, key=lambda i: points[i])
+    for previous, current in zip(roots, roots[1:]):
+        edges.append([f"R{previous}", f"R{current}", max(1, round(math.dist(points[previous], points[current])))])
+
+    return {'nodes': nodes, 'edges': edges}
+
+
+RUSH_HOUR_SHAPES = {
+    'arterial': [[0, 1.0], [420, 1.0], [510, 1.8], [690, 1.1], [990, 1.1], [1080, 1.7], [1260, 1.0]],
+    'local': [[0, 1.0], [450, 1.3], [600, 1.0], [1050, 1.25], [1200, 1.0]],
+}
+
+
+def addTravelTimeProfiles(graph, seed, share=0.6, shapes=RUSH_HOUR_SHAPES):
+    # Gives a share of the roads a rush-hour profile over a 1440-minute day.
+    # Roads too long for a shape's steepest fall would break FIFO, so they
+    # keep their static cost.
+    rng = random.Random(seed)
+    names = list(shapes)
+    steepestFall = {
+        name: max(
+            [(first[1] - second[1]) / (second[0] - first[0]) for first, second in zip(points, points[1:])]
+            + [(points[-1][1] - points[0][1]) / (points[0][0] + 1440 - points[-1][0]), 0.0]
+        )
+        for name, points in shapes.items()
+    }
+    assignments = []
+    for u, v, weight in graph['edges']:
+        if rng.random() < share:
+            name = rng.choice(names)
+            if weight * steepestFall[name] <= 1:
+                assignments.append([u, v, name])
+    graph['profiles'] = {'period': 1440, 'shapes': shapes, 'edges': assignments}
+    return graph
+
+
+def buildProjectPortfolio(numProjects, seed, maxCost=200):
+    rng = random.Random(seed)
+    projects = []
+    for i in range(numProjects):
+        cost = rng.randint(5, maxCost)
+        # Benefit loosely tracks cost so the greedy ratio order is not trivial.
+        benefit = max(1, int(cost * rng.uniform(0.5, 2.0)) + rng.randint(-10, 10))
+        projects.append({'name': f"Project {i}", 'cost': cost, 'benefit': benefit})
+    return projects
+
+
+def buildClusteredCoordinates(numPoints, seed, numClusters=None, extent=1000.0):
+    rng = random.Random(seed)
+    numClusters = numClusters or max(1, int(math.sqrt(numPoints) // 4))
+    centres = [(rng.uniform(0, extent), rng.uniform(0, extent), rng.uniform(extent / 100, extent / 20)) for _ in range(numClusters)]
+
+    coordinates = []
+    for i in range(numPoints):
+        x, y, spread = rng.choice(centres)
+        coordinates.append({'name': f"Site {i}", 'x': round(rng.gauss(x, spread), 3), 'y': round(rng.gauss(y, spread), 3)})
+    return coordinates
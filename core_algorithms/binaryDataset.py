@@ -0,0 +1,220 @@
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from core_algorithms.graphIndex import GraphIndex
+from core_algorithms.networkLoader import streamJsonNetwork
+from core_algorithms.travelTimeProfiles import TravelTimeProfiles
+
+MAGIC = b'UPDS'
+FORMAT_VERSION = 3
+ALIGNMENT = 64
+BINARY_FILE = 'dataset.bin'
+SOURCE_FILES = ('city_network.json', 'coordinates.json', 'projects.json')
+
+# Layout: MAGIC, uint32 format version, uint32 header length, a JSON header
+# describing every section (dtype, shape, byte offset), then the sections
+# themselves, each aligned to ALIGNMENT bytes so it can be memory-mapped.
+
+
+def packStrings(strings):
+    encoded = [text.encode('utf-8') for text in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(raw) for raw in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+def unpackStrings(offsets, raw):
+    data = raw.tobytes()
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]].decode('utf-8') for i in range(len(bounds) - 1)]
+
+
+def hashSourceFiles(dataDir):
+    # Same digest DatasetStore computes over the raw JSON bytes, so cache keys
+    # and ETags do not change when a worker switches to the binary file.
+    digest = hashlib.sha1()
+    for fileName in SOURCE_FILES:
+        try:
+            with open(os.path.join(dataDir, fileName), 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            continue
+    return digest.hexdigest()
+
+
+def sourceStamps(dataDir):
+    # Size and mtime of every JSON source, recorded in the header at build
+    # time. Any difference, including an older file being restored, makes
+    # the binary file stale.
+    stamps = {}
+    for fileName in SOURCE_FILES:
+        try:
+            stat = os.stat(os.path.join(dataDir, fileName))
+            stamps[fileName] = [stat.st_size, stat.st_mtime_ns]
+        except FileNotFoundError:
+            stamps[fileName] = None
+    return stamps
+
+
+def numericArray(values):
+    array = np.array(values)
+    if array.dtype.kind not in 'if':
+        array = array.astype(np.float64)
+    return array
+
+
+def writeBinaryDataset(path, index, coordinates, projects, sourceHash, sources=None):
+    sections = {}
+
+    def addStrings(name, strings):
+        sections[f'{name}.offsets'], sections[f'{name}.bytes'] = packStrings(strings)
+
+    addStrings('nodeIds', index.nodeIds)
+    addStrings('nodeNames', index.nodeNames)
+    for name in ('edgeU', 'edgeV', 'edgeWeights', 'offsets', 'targets', 'slotEdges', 'weights', 'sortedEdgeIds'):
+        sections[name] = np.ascontiguousarray(getattr(index, name))
+
+    profileHeader = None
+    if index.profiles is not None:
+        sections.update((name, np.ascontiguousarray(array)) for name, array in index.profiles.arrays().items())
+        profileHeader = {'period': index.profiles.period, 'names': index.profiles.names}
+
+    addStrings('coordinateNames', [point['name'] for point in coordinates])
+    sections['coordinates'] = numericArray([(point['x'], point['y']) for point in coordinates]).reshape(-1, 2)
+
+    addStrings('projectNames', [project['name'] for project in projects])
+    projectFields = sorted({key for project in projects for key in project if key != 'name'})
+    for field in projectFields:
+        sections[f'project.{field}'] = numericArray([project.get(field, 0) for project in projects])
+
+    header = {'sourceHash': sourceHash, 'sources': sources, 'projectFields': projectFields, 'profiles': profileHeader, 'mixedWeights': index.mixedWeights, 'sections': {}}
+    offset = 0
+    for name, array in sections.items():
+        offset = (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+        header['sections'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+
+    headerBytes = json.dumps(header).encode('utf-8')
+    dataStart = (12 + len(headerBytes) + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+    temporaryPath = f'{path}.tmp'
+    with open(temporaryPath, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.array([FORMAT_VERSION, len(headerBytes)], dtype='<u4').tobytes())
+        f.write(headerBytes)
+        for name, array in sections.items():
+            f.seek(dataStart + header['sections'][name]['offset'])
+            f.write(array.tobytes())
+    # Readers keep whatever file they mapped; the rename swaps in the new one.
+    os.replace(temporaryPath, path)
+
+
+def readHeader(path):
+    with open(path, 'rb') as f:
+        if f.read(4) != MAGIC:
+            raise ValueError(f"{path} is not a dataset binary file.")
+        version, headerLength = np.frombuffer(f.read(8), dtype='<u4').tolist()
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported dataset binary version {version} in {path}")
+        return headerLength, json.loads(f.read(headerLength))
+
+
+class BinaryDataset:
+    def __init__(self, path):
+        self.path = path
+        headerLength, header = readHeader(path)
+        dataStart = (12 + headerLength + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+        self.sourceHash = header['sourceHash']
+        self.projectFields = header['projectFields']
+        self.profileHeader = header.get('profiles')
+        self.mixedWeights = header['mixedWeights']
+        self.arrays = {}
+        for name, section in header['sections'].items():
+            dtype = np.dtype(section['dtype'])
+            shape = tuple(section['shape'])
+            if int(np.prod(shape)) == 0:
+                self.arrays[name] = np.empty(shape, dtype=dtype)
+            else:
+                self.arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=dataStart + section['offset'], shape=shape)
+
+    def strings(self, name):
+        return unpackStrings(self.arrays[f'{name}.offsets'], self.arrays[f'{name}.bytes'])
+
+    def graphIndex(self, version=None):
+        csr = {name: self.arrays[name] for name in ('offsets', 'targets', 'slotEdges', 'weights', 'sortedEdgeIds')}
+        profiles = None
+        if self.profileHeader is not None:
+            profiles = TravelTimeProfiles.fromArrays(self.profileHeader['period'], self.profileHeader['names'], self.arrays)
+        return GraphIndex(
+            self.strings('nodeIds'),
+            self.strings('nodeNames'),
+            self.arrays['edgeU'],
+            self.arrays['edgeV'],
+            self.arrays['edgeWeights'],
+            version,
+            csr=csr,
+            profiles=profiles,
+            mixedWeights=self.mixedWeights,
+        )
+
+    def coordinateRecords(self):
+        return [{'name': name, 'x': x, 'y': y} for name, (x, y) in zip(self.strings('coordinateNames'), self.arrays['coordinates'].tolist())]
+
+    def projectRecords(self):
+        projects = [{'name': name} for name in self.strings('projectNames')]
+        for field in self.projectFields:
+            for project, value in zip(projects, self.arrays[f'project.{field}'].tolist()):
+                project[field] = value
+        return projects
+
+
+def isBinaryDatasetFresh(dataDir='data'):
+    try:
+        _, header = readHeader(os.path.join(dataDir, BINARY_FILE))
+    except (OSError, ValueError):
+        return False
+    return header.get('sources') == sourceStamps(dataDir)
+
+
+def openFreshBinaryDataset(dataDir='data'):
+    if not isBinaryDatasetFresh(dataDir):
+        return None
+    return BinaryDataset(os.path.join(dataDir, BINARY_FILE))
+
+
+def buildBinaryDataset(dataDir='data', output=None):
+    # Stamped before reading, so a source rewritten mid-build leaves the
+    # output stale rather than fresh.
+    sources = sourceStamps(dataDir)
+    index = streamJsonNetwork(os.path.join(dataDir, SOURCE_FILES[0]))
+
+    records = []
+    for fileName in SOURCE_FILES[1:]:
+        try:
+            with open(os.path.join(dataDir, fileName)) as f:
+                records.append(json.load(f))
+        except FileNotFoundError:
+            records.append([])
+
+    output = output or os.path.join(dataDir, BINARY_FILE)
+    writeBinaryDataset(output, index, records[0], records[1], hashSourceFiles(dataDir), sources)
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack the JSON datasets into a memory-mappable binary file.")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    output = buildBinaryDataset(args.data_dir, args.output)
+    print(f"Wrote {output}")
+
+
+if __name__ == '__main__':
+    main()
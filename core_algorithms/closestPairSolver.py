@@ -1,29 +1,26 @@
 import math
 import json
 
+from core_algorithms.binaryDataset import openFreshBinaryDataset
+from core_algorithms.instrumentation import recordSolverStats
+from core_algorithms.spatialIndex import SpatialIndex
+
 def euclidean_distance(p1, p2):
     return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
 
-def findClosestPair(points):
+def findClosestPair(points, index=None):
     if len(points) < 2:
         return {'distance': float('inf'), 'pair': None, 'total_points': len(points)}
 
-    min_dist = float('inf')
-    closest_pair = None
+    if index is None:
+        index = SpatialIndex([point['coords'] for point in points])
 
-    for i in range(len(points)):
-        for j in range(i + 1, len(points)):
-            p1 = points[i]['coords']
-            p2 = points[j]['coords']
-            dist = euclidean_distance(p1, p2)
-            
-            if dist < min_dist:
-                min_dist = dist
-                closest_pair = (points[i], points[j])
-                
-    if closest_pair:
-        p1_info = closest_pair[0]
-        p2_info = closest_pair[1]
+    closest, comparisons = index.closestPairWithComparisons()
+    recordSolverStats('closestPair', points=len(points), pairComparisons=comparisons)
+    if closest:
+        first, second, min_dist = closest
+        p1_info = points[first]
+        p2_info = points[second]
 
         return {
             'distance': round(min_dist, 2),
@@ -36,13 +33,40 @@ def findClosestPair(points):
     else:
         return {'distance': 0, 'pair': None, 'total_points': len(points)}
 
+def matchToNearestFacility(points, facilities, index=None):
+    if len(points) == 0 or len(facilities) == 0:
+        return []
+
+    if index is None:
+        index = SpatialIndex([facility['coords'] for facility in facilities])
+
+    distances, indices = index.nearest([point['coords'] for point in points])
+    matches = []
+    for point, distance, facilityIndex in zip(points, distances[:, 0].tolist(), indices[:, 0].tolist()):
+        facility = facilities[facilityIndex]
+        matches.append({
+            'name': point['name'],
+            'coords': point['coords'],
+            'facility_name': facility['name'],
+            'facility_coords': facility['coords'],
+            'distance': round(distance, 2)
+        })
+    return matches
+
 def loadProximityData():
+    binary = openFreshBinaryDataset()
+    if binary is not None:
+        return buildProximityPoints(binary.coordinateRecords())
+
     try:
         with open('data/coordinates.json') as f:
             data = json.load(f)
     except FileNotFoundError:
         return [], []
 
+    return buildProximityPoints(data)
+
+def buildProximityPoints(data):
     emergency_points = []
     for i, p in enumerate(data):
         emergency_points.append({
@@ -1,22 +1,41 @@
+from fractions import Fraction
+
 import numpy as np
 
-import math
+from core_algorithms.instrumentation import recordSolverStats
 
+# Shewchuk's error bound for the floating-point orient2d determinant: when
+# |det| exceeds this fraction of the summed term magnitudes its sign is exact.
+ORIENTATION_ERROR_BOUND = (3.0 + 16.0 * np.finfo(np.float64).eps) * np.finfo(np.float64).eps
 
 
-def getOrientation(p, q, r):
 
-    val = (q[1] - p[1]) * (r[0] - q[0]) - \
-          (q[0] - p[0]) * (r[1] - q[1])
+def getCrossProduct(o, a, b):
 
-    
+    left = (a[0] - o[0]) * (b[1] - o[1])
+
+    right = (a[1] - o[1]) * (b[0] - o[0])
+
+    cross = left - right
+
+    if isinstance(cross, float) and abs(cross) <= ORIENTATION_ERROR_BOUND * (abs(left) + abs(right)):
+
+        o, a, b = [(Fraction(p[0]), Fraction(p[1])) for p in (o, a, b)]
+
+        cross = (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    return cross
+
+
+
+def getOrientation(p, q, r):
+
+    val = -getCrossProduct(p, q, r)
 
     if val == 0: 
 
         return 0
 
-        
-
     return 1 if val > 0 else 2 
 
 
@@ -27,128 +46,195 @@ def getSquaredDistance(p1, p2):
 
 
 
-def runGrahamScan(pointsArray):
+def discardInteriorPoints(points):
 
-    
+    # Akl-Toussaint filter: points strictly inside the polygon spanned by the
+    # eight directional extremes can never be hull vertices. The margin keeps
+    # the test conservative, so rounding only ever keeps extra candidates.
 
-    if len(pointsArray) < 3:
+    x = points[:, 0]
 
-        return list(pointsArray)
+    y = points[:, 1]
 
+    extremes = [np.argmin(y), np.argmax(x - y), np.argmax(x), np.argmax(x + y),
 
+                np.argmax(y), np.argmax(y - x), np.argmin(x), np.argmin(x + y)]
 
-    allPoints = [tuple(p) for p in pointsArray]
+    ordered = []
 
+    for i in extremes:
 
+        if not ordered or ordered[-1] != i:
 
-    startPoint = min(allPoints, key=lambda p: (p[1], p[0]))
+            ordered.append(i)
 
-    
+    if len(ordered) > 1 and ordered[0] == ordered[-1]:
 
-    pointsList = allPoints[:]
+        ordered.pop()
 
-    pointsList.remove(startPoint)
+    polygon = points[ordered]
 
-    
+    if len(polygon) < 3:
 
-    def getPolarAngleSortKey(point):
+        return np.arange(len(points))
 
-        angle = math.atan2(point[1] - startPoint[1], point[0] - startPoint[0])
+    scale = np.abs(points).max() + 1.0
 
-        distance = getSquaredDistance(startPoint, point)
+    keep = np.zeros(len(points), dtype=bool)
 
-        return (angle, distance)
+    for start, end in zip(polygon, np.roll(polygon, -1, axis=0)):
 
+        cross = (end[0] - start[0]) * (y - start[1]) - (end[1] - start[1]) * (x - start[0])
 
+        keep |= cross <= 1e-9 * scale * scale
 
-    pointsListWithAngle = []
+    keep[ordered] = True
 
-    for point in pointsList:
+    return np.flatnonzero(keep)
 
-        angle = math.atan2(point[1] - startPoint[1], point[0] - startPoint[0])
 
-        distance = getSquaredDistance(startPoint, point)
 
-        pointsListWithAngle.append((angle, distance, point))
+def runMonotoneChain(pointsArray):
 
-        
+    points = np.asarray(pointsArray)
 
-    pointsListWithAngle.sort()
+    if len(points) == 0:
 
-    
+        return []
 
-    pointsList = [p[2] for p in pointsListWithAngle]
+    candidates = discardInteriorPoints(points.astype(np.float64)) if len(points) > 64 else np.arange(len(points))
 
+    order = candidates[np.lexsort((points[candidates, 1], points[candidates, 0]))]
 
+    sortedPoints = points[order]
 
-    m = 1
+    distinct = np.ones(len(order), dtype=bool)
 
-    for i in range(1, len(pointsList)):
+    distinct[1:] = np.any(sortedPoints[1:] != sortedPoints[:-1], axis=1)
 
-        while i < len(pointsList) and getOrientation(startPoint, pointsList[m-1], pointsList[i]) == 0:
-            i += 1
-        if i < len(pointsList):
+    order = order[distinct]
 
-            pointsList[m] = pointsList[i]
+    coords = points[order].tolist()
 
-            m += 1
-    pointsList = pointsList[:m]
+    indices = order.tolist()
 
+    def buildChain(sequence):
 
+        chain = []
 
-    if len(pointsList) < 2:
+        for position in sequence:
 
-        return [startPoint]
+            while len(chain) > 1 and getCrossProduct(coords[chain[-2]], coords[chain[-1]], coords[position]) <= 0:
 
+                chain.pop()
 
+            chain.append(position)
 
-    hullStack = [startPoint, pointsList[0]] 
+        return chain
 
-    
+    lower = buildChain(range(len(coords)))
 
-    for i in range(1, len(pointsList)):
+    upper = buildChain(range(len(coords) - 1, -1, -1))
 
-        pNext = pointsList[i]
+    hull = lower[:-1] + upper[:-1]
 
-        
+    if not hull:
 
-        while len(hullStack) > 1 and getOrientation(hullStack[-2], hullStack[-1], pNext) != 2:
+        hull = lower
 
-            hullStack.pop()
+    # Start from the lowest (then leftmost) vertex and walk counter-clockwise,
+    # the same vertex order the dashboard has always displayed.
 
-            
+    first = min(range(len(hull)), key=lambda k: (coords[hull[k]][1], coords[hull[k]][0]))
 
-        hullStack.append(pNext)
+    hull = hull[first:] + hull[:first]
 
-        
-
-    return hullStack
+    return [indices[position] for position in hull]
 
 
 
 def calculatePolygonArea(hullPoints):
 
-    xCoords = [p[0] for p in hullPoints]
+    coords = np.asarray(hullPoints, dtype=np.float64).reshape(-1, 2)
 
-    yCoords = [p[1] for p in hullPoints]
+    if len(coords) < 3:
 
-    
+        return 0.0
 
-    area = 0.0
+    xCoords = coords[:, 0]
 
-    numPoints = len(hullPoints)
+    yCoords = coords[:, 1]
 
-    for i in range(numPoints):
+    area = np.dot(xCoords, np.roll(yCoords, -1)) - np.dot(np.roll(xCoords, -1), yCoords)
 
-        j = (i + 1) % numPoints
+    return abs(float(area)) / 2.0
 
-        area += (xCoords[i] * yCoords[j])
 
-        area -= (xCoords[j] * yCoords[i])
 
-        
+def isInsideConvexPolygon(hullPoints, queryPoints):
+
+    hull = np.asarray(hullPoints, dtype=np.float64).reshape(-1, 2)
+
+    queries = np.asarray(queryPoints, dtype=np.float64).reshape(-1, 2)
+
+    inside = np.ones(len(queries), dtype=bool)
 
-    return abs(area) / 2.0
+    if len(hull) < 3:
+
+        return inside & False
+
+    for start, end in zip(hull, np.roll(hull, -1, axis=0)):
+
+        cross = (end[0] - start[0]) * (queries[:, 1] - start[1]) - (end[1] - start[1]) * (queries[:, 0] - start[0])
+
+        inside &= cross >= 0
+
+    return inside
+
+
+
+class IncrementalHull:
+
+    def __init__(self, pointsArray, names=None):
+
+        self.vertices = np.empty((0, 2))
+
+        self.names = []
+
+        self.area = 0.0
+
+        self.addPoints(pointsArray, names)
+
+    def addPoints(self, pointsArray, names=None):
+
+        points = np.asarray(pointsArray, dtype=np.float64).reshape(-1, 2)
+
+        if names is None:
+
+            names = ["Unknown Point"] * len(points)
+
+        # Points already inside the stored hull cannot change it; only the
+        # outside ones are merged with the current vertices.
+
+        outside = np.flatnonzero(~isInsideConvexPolygon(self.vertices, points))
+
+        if len(outside) == 0:
+
+            return False
+
+        mergedPoints = np.vstack([self.vertices, points[outside]])
+
+        mergedNames = self.names + [names[i] for i in outside.tolist()]
+
+        hullIndices = runMonotoneChain(mergedPoints)
+
+        self.vertices = mergedPoints[hullIndices]
+
+        self.names = [mergedNames[i] for i in hullIndices]
+
+        self.area = calculatePolygonArea(self.vertices)
+
+        return True
 
 
 
@@ -168,25 +254,22 @@ def buildConvexHull(pointsList):
 
     try:
 
-        hullCoords = runGrahamScan(np.array(coords))
-
-        
-
-        area = calculatePolygonArea(hullCoords)
+        hullIndices = runMonotoneChain(np.array(coords))
+        recordSolverStats('convexHull', points=len(coords), hullVertices=len(hullIndices))
 
         
 
-        originalPointsMap = {tuple([point['x'], point['y']]): point['name'] for point in pointsList}
+        area = calculatePolygonArea([coords[i] for i in hullIndices])
 
         
 
         hullPointsStringList = []
 
-        for xCoord, yCoord in hullCoords:
+        for i in hullIndices:
 
-            name = originalPointsMap.get((xCoord, yCoord), "Unknown Point")
+            xCoord, yCoord = coords[i]
 
-            hullPointsStringList.append(f"{name} ({xCoord}, {yCoord})")
+            hullPointsStringList.append(f"{pointsList[i]['name']} ({xCoord}, {yCoord})")
 
 
 
@@ -204,4 +287,4 @@ def buildConvexHull(pointsList):
 
     except Exception as e:
 
-        return {'hullPointsStr': "Calculation failed.", 'area': 0, 'error': f"Hull calculation failed: {e}"}
\ No newline at end of file
+        return {'hullPointsStr': "Calculation failed.", 'area': 0, 'error': f"Hull calculation failed: {e}"}
@@ -0,0 +1,199 @@
+import heapq
+import threading
+
+import numpy as np
+
+from core_algorithms.graphIndex import asGraphIndex
+from core_algorithms.instrumentation import recordSolverStats
+
+
+def runMultiSourceDijkstra(index, sources):
+    # One Dijkstra pass seeded with every source at distance 0 gives each
+    # node its network distance to the nearest source and which one it is.
+    offsets, targets, weights, _ = index.csrLists()
+
+    distances = [float('inf')] * index.numNodes
+    nearest = [-1] * index.numNodes
+    visited = [False] * index.numNodes
+    priorityQueue = []
+    for source in sources:
+        if distances[source] != 0:
+            distances[source] = 0
+            nearest[source] = source
+            priorityQueue.append((0, source))
+    heapq.heapify(priorityQueue)
+    sourceCount = len(priorityQueue)
+    nodesSettled = 0
+
+    while priorityQueue:
+        currentDistance, currentNode = heapq.heappop(priorityQueue)
+
+        if visited[currentNode]:
+            continue
+
+        visited[currentNode] = True
+        nodesSettled += 1
+
+        for slot in range(offsets[currentNode], offsets[currentNode + 1]):
+            neighbor = targets[slot]
+            distance = currentDistance + weights[slot]
+
+            if distance < distances[neighbor]:
+                distances[neighbor] = distance
+                nearest[neighbor] = nearest[currentNode]
+                heapq.heappush(priorityQueue, (distance, neighbor))
+
+    recordSolverStats('multiSourceDijkstra', sources=sourceCount, nodesSettled=nodesSettled)
+    return distances, nearest
+
+
+def runBoundedDijkstra(index, source, radius):
+    # Nodes within radius of source, in order of distance.
+    offsets, targets, weights, _ = index.csrLists()
+
+    distances = {source: 0}
+    settledNodes = []
+    settledDistances = []
+    priorityQueue = [(0, source)]
+
+    while priorityQueue:
+        currentDistance, currentNode = heapq.heappop(priorityQueue)
+
+        if currentDistance > distances[currentNode]:
+            continue
+
+        settledNodes.append(currentNode)
+        settledDistances.append(currentDistance)
+
+        for slot in range(offsets[currentNode], offsets[currentNode + 1]):
+            neighbor = targets[slot]
+            distance = currentDistance + weights[slot]
+
+            if distance <= radius and distance < distances.get(neighbor, float('inf')):
+                distances[neighbor] = distance
+                heapq.heappush(priorityQueue, (distance, neighbor))
+
+    return np.array(settledNodes, dtype=np.int64), np.array(settledDistances, dtype=np.float64)
+
+
+class CoverageAnalysis:
+    # Distances to the nearest existing facility are computed once. Candidate
+    # site balls (nodes reachable within the largest radius asked for so far)
+    # are cached as sorted arrays, so a smaller threshold is a binary search
+    # and a different k reuses every ball.
+
+    def __init__(self, graph, facilityNodes):
+        self.index = asGraphIndex(graph)
+        self.facilities = sorted(set(facilityNodes))
+        distances, nearest = runMultiSourceDijkstra(self.index, self.facilities)
+        self.distances = np.array(distances, dtype=np.float64)
+        self.nearestFacility = np.array(nearest, dtype=np.int64)
+        self._balls = {}
+        self._ballRadius = -1.0
+        self._ballLock = threading.Lock()
+
+    def underservedNodes(self, threshold):
+        return np.flatnonzero(self.distances > threshold)
+
+    def candidateBall(self, candidate, threshold):
+        with self._ballLock:
+            if threshold > self._ballRadius:
+                self._balls.clear()
+                self._ballRadius = float(threshold)
+            ball = self._balls.get(candidate)
+            if ball is None:
+                ball = self._balls[candidate] = runBoundedDijkstra(self.index, candidate, self._ballRadius)
+        nodes, distances = ball
+        return nodes[:np.searchsorted(distances, threshold, side='right')]
+
+    def proposeSites(self, k, threshold, candidates=None, lazy=True, demand=None):
+        # Greedy maximum coverage: each pick adds the site covering the most
+        # still-underserved demand. Coverage is submodular, so a candidate's
+        # last computed gain is an upper bound and lazy evaluation only
+        # recomputes the candidate at the top of the heap.
+        uncovered = self.distances > threshold
+        demand = np.ones(self.index.numNodes) if demand is None else np.asarray(demand, dtype=np.float64)
+        if candidates is None:
+            candidates = range(self.index.numNodes)
+        facilities = set(self.facilities)
+        candidates = [candidate for candidate in candidates if candidate not in facilities]
+
+        def gainOf(candidate):
+            ball = self.candidateBall(candidate, threshold)
+            return float(demand[ball[uncovered[ball]]].sum())
+
+        proposals = []
+        evaluations = 0
+        if lazy:
+            heap = []
+            for candidate in candidates:
+                evaluations += 1
+                heap.append((-gainOf(candidate), candidate, 0))
+            heapq.heapify(heap)
+            while heap and len(proposals) < k:
+                negativeGain, candidate, evaluatedAt = heapq.heappop(heap)
+                if evaluatedAt != len(proposals):
+                    evaluations += 1
+                    heapq.heappush(heap, (-gainOf(candidate), candidate, len(proposals)))
+                    continue
+                if -negativeGain <= 0:
+                    break
+                proposals.append((candidate, -negativeGain))
+                uncovered[self.candidateBall(candidate, threshold)] = False
+        else:
+            remaining = list(candidates)
+            while remaining and len(proposals) < k:
+                gains = [gainOf(candidate) for candidate in remaining]
+                evaluations += len(remaining)
+                best = max(range(len(remaining)), key=lambda position: (gains[position], -remaining[position]))
+                if gains[best] <= 0:
+                    break
+                candidate = remaining.pop(best)
+                proposals.append((candidate, gains[best]))
+                uncovered[self.candidateBall(candidate, threshold)] = False
+
+        recordSolverStats('facilityGreedy', gainEvaluations=evaluations, sitesProposed=len(proposals))
+        return proposals, uncovered
+
+    def report(self, threshold, k=0, lazy=True):
+        index = self.index
+
+        def describe(node):
+            distance = self.distances[node]
+            nearest = self.nearestFacility[node]
+            return {
+                'node': index.nodeIds[node],
+                'name': index.nodeNames[node],
+                'distance': None if np.isinf(distance) else distance.item(),
+                'nearestFacility': index.nodeNames[nearest] if nearest >= 0 else None,
+            }
+
+        underserved = self.underservedNodes(threshold)
+        proposals, uncoveredAfter = self.proposeSites(k, threshold, lazy=lazy) if k > 0 else ([], self.distances > threshold)
+
+        return {
+            'threshold': threshold,
+            'totalNodes': index.numNodes,
+            'facilityCount': len(self.facilities),
+            'underserved': [describe(node) for node in underserved.tolist()],
+            'coveredBefore': int(index.numNodes - len(underserved)),
+            'proposals': [
+                {'node': index.nodeIds[node], 'name': index.nodeNames[node], 'newlyCovered': int(gain)}
+                for node, gain in proposals
+            ],
+            'coveredAfter': int(index.numNodes - np.count_nonzero(uncoveredAfter)),
+        }
+
+
+def matchFacilitiesToNodes(index, facilityPoints):
+    # Facilities come from coordinates.json and are tied to road-network
+    # nodes by name (or by node id).
+    byName = {name: node for node, name in enumerate(index.nodeNames)}
+    matched, unmatched = [], []
+    for point in facilityPoints:
+        node = byName.get(point['name'], index.nodeIndex.get(point['name']))
+        if node is None:
+            unmatched.append(point['name'])
+        else:
+            matched.append(node)
+    return matched, unmatched
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+import threading
+from functools import cached_property
+
+import numpy as np
+
+from core_algorithms.binaryDataset import BINARY_FILE, BinaryDataset, isBinaryDatasetFresh
+from core_algorithms.distanceMatrix import MANIFEST_FILE, loadDistanceMatrix
+from core_algorithms.graphIndex import buildGraphIndex
+from core_algorithms.landmarkRouter import loadLandmarkRouter
+from core_algorithms.lazyImports import lazyModule
+
+# Only needed by derived structures, which are built on first use.
+closestPairSolver = lazyModule('core_algorithms.closestPairSolver')
+coverageAnalyzer = lazyModule('core_algorithms.coverageAnalyzer')
+mstBuilder = lazyModule('core_algorithms.mstBuilder')
+spatialIndex = lazyModule('core_algorithms.spatialIndex')
+
+NETWORK_FILE = 'city_network.json'
+COORDINATES_FILE = 'coordinates.json'
+PROJECTS_FILE = 'projects.json'
+LANDMARKS_FILE = 'city_network.landmarks.npz'
+MATRIX_DIR = 'city_network.matrix'
+
+
+class DatasetSnapshot:
+    # Everything beyond the graph index, coordinate array and project list is
+    # derived on first use, so a worker opening the memory-mapped binary file
+    # only pays for the structures its requests actually touch.
+
+    def __init__(self, graphIndex, coordinateNames, coordinateArray, projects, signature, contentHash, version, network=None):
+        self.graphIndex = graphIndex
+        self.coordinateNames = coordinateNames
+        self.coordinateArray = coordinateArray
+        self.projects = projects
+        self.signature = signature
+        self.contentHash = contentHash
+        self.version = version
+        self.landmarkRouter = None
+        self.distanceMatrix = None
+        if network is not None:
+            self.network = network
+
+    @classmethod
+    def fromJson(cls, network, coordinates, projects, signature, contentHash, version):
+        coordinateNames = [point['name'] for point in coordinates]
+        coordinateArray = np.array([(point['x'], point['y']) for point in coordinates]).reshape(-1, 2)
+        snapshot = cls(buildGraphIndex(network, version), coordinateNames, coordinateArray, projects, signature, contentHash, version, network)
+        snapshot.coordinates = coordinates
+        return snapshot
+
+    @classmethod
+    def fromBinary(cls, binary, signature, version):
+        return cls(
+            binary.graphIndex(version),
+            binary.strings('coordinateNames'),
+            binary.arrays['coordinates'],
+            binary.projectRecords(),
+            signature,
+            binary.sourceHash,
+            version,
+        )
+
+    @cached_property
+    def network(self):
+        index = self.graphIndex
+        nodes = [{'id': nodeId, 'name': name} for nodeId, name in zip(index.nodeIds, index.nodeNames)]
+        edges = [[index.nodeIds[u], index.nodeIds[v], weight] for u, v, weight in zip(index.edgeU.tolist(), index.edgeV.tolist(), index.weightList(index.edgeWeights))]
+        return {'nodes': nodes, 'edges': edges}
+
+    @cached_property
+    def coordinates(self):
+        return [{'name': name, 'x': x, 'y': y} for name, (x, y) in zip(self.coordinateNames, self.coordinateArray.tolist())]
+
+    @property
+    def nodeIds(self):
+        return self.graphIndex.nodeIds
+
+    @cached_property
+    def networkNodes(self):
+        return [{'id': nodeId, 'name': name} for nodeId, name in zip(self.graphIndex.nodeIds, self.graphIndex.nodeNames)]
+
+    @cached_property
+    def formattedEdges(self):
+        return [f"{u} <--> {v} (Cost: {w})" for u, v, w in self.network['edges']]
+
+    @cached_property
+    def proximityPoints(self):
+        return closestPairSolver.buildProximityPoints(self.coordinates)
+
+    @property
+    def emergencyPoints(self):
+        return self.proximityPoints[0]
+
+    @property
+    def underservedPoints(self):
+        return self.proximityPoints[1]
+
+    @cached_property
+    def proximityIndex(self):
+        return spatialIndex.SpatialIndex(self.coordinateArray)
+
+    @cached_property
+    def facilityPoints(self):
+        underservedCoords = {point['coords'] for point in self.underservedPoints}
+        return [point for point in self.emergencyPoints if point['coords'] not in underservedCoords]
+
+    @cached_property
+    def underservedMatches(self):
+        return closestPairSolver.matchToNearestFacility(self.underservedPoints, self.facilityPoints)
+
+    @cached_property
+    def facilityCoverage(self):
+        facilityNodes, _ = coverageAnalyzer.matchFacilitiesToNodes(self.graphIndex, self.facilityPoints)
+        return coverageAnalyzer.CoverageAnalysis(self.graphIndex, facilityNodes)
+
+    @cached_property
+    def dynamicMST(self):
+        # Scenario queries work on a copy; this base tree is never mutated.
+        return mstBuilder.DynamicMST(self.graphIndex)
+
+
+class DatasetStore:
+    def __init__(self, dataDir='data'):
+        self.dataDir = dataDir
+        self.paths = {
+            'network': os.path.join(dataDir, NETWORK_FILE),
+            'coordinates': os.path.join(dataDir, COORDINATES_FILE),
+            'projects': os.path.join(dataDir, PROJECTS_FILE),
+            'landmarks': os.path.join(dataDir, LANDMARKS_FILE),
+            'binary': os.path.join(dataDir, BINARY_FILE),
+            'matrix': os.path.join(dataDir, MATRIX_DIR),
+        }
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = 0
+        self._reloadListeners = []
+
+    def addReloadListener(self, listener):
+        if listener not in self._reloadListeners:
+            self._reloadListeners.append(listener)
+
+    def _readSignature(self):
+        signature = []
+        for key in ('network', 'coordinates', 'projects', 'landmarks', 'binary', 'matrix'):
+            try:
+                stat = os.stat(os.path.join(self.paths[key], MANIFEST_FILE) if key == 'matrix' else self.paths[key])
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _readJson(self, key, default, digest):
+        try:
+            with open(self.paths[key], 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            if default is None:
+                raise
+            return default
+        digest.update(raw)
+        return json.loads(raw)
+
+    def _load(self, signature):
+        self._version += 1
+        # A binary dataset built from the current JSON sources is mapped
+        # read-only instead of parsed, so workers share it via the page cache.
+        if isBinaryDatasetFresh(self.dataDir):
+            snapshot = DatasetSnapshot.fromBinary(BinaryDataset(self.paths['binary']), signature, self._version)
+        else:
+            digest = hashlib.sha1()
+            network = self._readJson('network', None, digest)
+            coordinates = self._readJson('coordinates', [], digest)
+            projects = self._readJson('projects', [], digest)
+            snapshot = DatasetSnapshot.fromJson(network, coordinates, projects, signature, digest.hexdigest(), self._version)
+
+        # Landmarks are optional preprocessing; a stale file is simply ignored.
+        snapshot.landmarkRouter = loadLandmarkRouter(self.paths['landmarks'], snapshot.graphIndex)
+        snapshot.distanceMatrix = loadDistanceMatrix(self.paths['matrix'], snapshot.graphIndex)
+        return snapshot
+
+    def get(self):
+        snapshot = self._snapshot
+        signature = self._readSignature()
+        if snapshot is not None and snapshot.signature == signature:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.signature != signature:
+                # Build the replacement fully before publishing it, so concurrent
+                # readers only ever see a complete snapshot.
+                snapshot = self._publish(self._load(signature))
+        return snapshot
+
+    def reload(self):
+        with self._lock:
+            return self._publish(self._load(self._readSignature()))
+
+    def _publish(self, snapshot):
+        previous = self._snapshot
+        self._snapshot = snapshot
+        if previous is not None:
+            for listener in self._reloadListeners:
+                listener(snapshot)
+        return snapshot
+
+
+_defaultStore = None
+_defaultStoreLock = threading.Lock()
+
+
+def getDatasetStore():
+    global _defaultStore
+    if _defaultStore is None:
+        with _defaultStoreLock:
+            if _defaultStore is None:
+                _defaultStore = DatasetStore()
+    return _defaultStore
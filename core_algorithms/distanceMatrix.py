@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from core_algorithms.binaryDataset import BinaryDataset
+from core_algorithms.landmarkRouter import graphFingerprint
+from core_algorithms.networkLoader import loadNetworkFile
+from core_algorithms.shortestPath import formatPathResult, getShortestPathTree, runDijkstra
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+DEFAULT_TILE_BYTES = 1 << 30
+SOURCES_PER_TASK = 64
+# float32 holds every integer below 2**24 exactly, and nothing else for sure.
+EXACT_FLOAT32_LIMIT = 1 << 24
+
+# On-disk layout: a directory holding manifest.json and one .npy file per
+# tile of consecutive source rows (plus matching predecessor tiles when
+# requested). A graph small enough for one tile is a single V x V float32
+# matrix; a huge one is split so no single file or mapping gets unwieldy.
+
+
+def tileFileName(kind, start, end):
+    return f"{kind}.{start:09d}-{end:09d}.npy"
+
+
+def openGraphSource(source):
+    if isinstance(source, str):
+        if source.endswith('.bin'):
+            return BinaryDataset(source).graphIndex()
+        return loadNetworkFile(source)
+    return source
+
+
+# Worker-side state. The graph arrives once per worker through the pool
+# initializer (inherited copy-on-write under fork, or opened from a
+# memory-mapped file path), never once per task.
+
+_workerGraph = None
+_workerTiles = {}
+
+
+def initMatrixWorker(graphSource):
+    global _workerGraph
+    _workerGraph = openGraphSource(graphSource)
+    _workerTiles.clear()
+
+
+def openTile(path):
+    tile = _workerTiles.get(path)
+    if tile is None:
+        tile = _workerTiles[path] = np.load(path, mmap_mode='r+')
+    return tile
+
+
+def computeSourceRows(outputDir, tile, sources, withPredecessors):
+    # Writes the rows for sources straight into the tile's mapping; tiles are
+    # split by row, so concurrent workers never touch the same bytes.
+    start, end = tile
+    distanceTile = openTile(os.path.join(outputDir, tileFileName('distances', start, end)))
+    predecessorTile = openTile(os.path.join(outputDir, tileFileName('predecessors', start, end))) if withPredecessors else None
+
+    for source in sources:
+        distances, predecessors = runDijkstra(_workerGraph, source)
+        distanceTile[source - start] = distances
+        if predecessorTile is not None:
+            predecessorTile[source - start] = predecessors
+
+    distanceTile.flush()
+    if predecessorTile is not None:
+        predecessorTile.flush()
+    return len(sources)
+
+
+def buildDistanceMatrix(graphSource, outputDir, workers=None, withPredecessors=False, tileRows=None, log=None):
+    index = openGraphSource(graphSource)
+    numNodes = index.numNodes
+    if tileRows is None:
+        tileRows = max(1, min(numNodes, DEFAULT_TILE_BYTES // max(1, 4 * numNodes)))
+
+    os.makedirs(outputDir, exist_ok=True)
+    # Drop the old manifest before touching any tile, so no reader can pair
+    # it with half-rewritten rows.
+    for fileName in os.listdir(outputDir):
+        if fileName == MANIFEST_FILE or (fileName.endswith('.npy') and fileName.split('.')[0] in ('distances', 'predecessors')):
+            os.remove(os.path.join(outputDir, fileName))
+    tiles = [(start, min(start + tileRows, numNodes)) for start in range(0, numNodes, tileRows)]
+    for start, end in tiles:
+        np.lib.format.open_memmap(os.path.join(outputDir, tileFileName('distances', start, end)), mode='w+', dtype=np.float32, shape=(end - start, numNodes))
+        if withPredecessors:
+            np.lib.format.open_memmap(os.path.join(outputDir, tileFileName('predecessors', start, end)), mode='w+', dtype=np.int32, shape=(end - start, numNodes))
+
+    tasks = [
+        ((start, end), list(range(taskStart, min(taskStart + SOURCES_PER_TASK, end))))
+        for start, end in tiles
+        for taskStart in range(start, end, SOURCES_PER_TASK)
+    ]
+
+    startedAt = time.perf_counter()
+    completed = 0
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        initMatrixWorker(index)
+        for tile, sources in tasks:
+            completed += computeSourceRows(outputDir, tile, sources, withPredecessors)
+            if log:
+                log(completed, numNodes, time.perf_counter() - startedAt)
+    else:
+        # A path is re-opened in each worker; an in-memory index is handed
+        # to the initializer once per worker.
+        with ProcessPoolExecutor(max_workers=workers, initializer=initMatrixWorker, initargs=(graphSource if isinstance(graphSource, str) else index,)) as pool:
+            futures = [pool.submit(computeSourceRows, outputDir, tile, sources, withPredecessors) for tile, sources in tasks]
+            for future in as_completed(futures):
+                completed += future.result()
+                if log:
+                    log(completed, numNodes, time.perf_counter() - startedAt)
+    elapsed = time.perf_counter() - startedAt
+
+    manifest = {
+        'formatVersion': FORMAT_VERSION,
+        'fingerprint': graphFingerprint(index),
+        'numNodes': numNodes,
+        'tileRows': tileRows,
+        'tiles': [[start, end] for start, end in tiles],
+        'predecessors': withPredecessors,
+        'nodeIds': list(index.nodeIds),
+        'elapsedSeconds': round(elapsed, 3),
+        'sourcesPerSecond': round(numNodes / elapsed, 3) if elapsed > 0 else None,
+        'workers': workers,
+    }
+    # The manifest is written last, so a half-built matrix is never opened.
+    temporaryPath = os.path.join(outputDir, f"{MANIFEST_FILE}.tmp")
+    with open(temporaryPath, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(temporaryPath, os.path.join(outputDir, MANIFEST_FILE))
+    return manifest
+
+
+class DistanceMatrix:
+    def __init__(self, outputDir):
+        with open(os.path.join(outputDir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        if manifest['formatVersion'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported distance matrix version in {outputDir}")
+
+        self.outputDir = outputDir
+        self.fingerprint = manifest['fingerprint']
+        self.numNodes = manifest['numNodes']
+        self.tileRows = manifest['tileRows']
+        self.nodeIds = manifest['nodeIds']
+        self.nodeIndex = {nodeId: i for i, nodeId in enumerate(self.nodeIds)}
+        self.hasPredecessors = manifest['predecessors']
+        self.sourcesPerSecond = manifest.get('sourcesPerSecond')
+
+        self.distanceTiles = [np.load(os.path.join(outputDir, tileFileName('distances', start, end)), mmap_mode='r') for start, end in manifest['tiles']]
+        self.predecessorTiles = None
+        if self.hasPredecessors:
+            self.predecessorTiles = [np.load(os.path.join(outputDir, tileFileName('predecessors', start, end)), mmap_mode='r') for start, end in manifest['tiles']]
+
+    def distanceRow(self, source):
+        return self.distanceTiles[source // self.tileRows][source % self.tileRows]
+
+    def predecessorRow(self, source):
+        if self.predecessorTiles is None:
+            raise ValueError("This distance matrix was built without predecessor rows.")
+        return self.predecessorTiles[source // self.tileRows][source % self.tileRows]
+
+    def distance(self, source, target):
+        return float(self.distanceTiles[source // self.tileRows][source % self.tileRows, target])
+
+    def exactValues(self, index, values):
+        # Entries are float32. Only integer distances below 2**24 read back
+        # as exactly what a live Dijkstra run returns; float sums and larger
+        # integers are rounded, so callers answer those live instead.
+        if index.edgeWeights.dtype.kind != 'i':
+            return None
+        if any(EXACT_FLOAT32_LIMIT <= value < float('inf') for value in values):
+            return None
+        return [None if value == float('inf') else int(value) for value in values]
+
+    def lookup(self, index, nodeList):
+        # Same shape and values as solveDistanceMatrix, answered from the
+        # mapped rows wherever they are exact.
+        invalidNodes = [node for node in nodeList if node not in self.nodeIndex]
+        if invalidNodes:
+            return {'nodes': nodeList, 'distances': [], 'error': f"Error: Invalid Node ({', '.join(invalidNodes)})"}
+
+        columns = [self.nodeIndex[node] for node in nodeList]
+        matrix = []
+        for node in nodeList:
+            source = self.nodeIndex[node]
+            values = self.exactValues(index, self.distanceRow(source)[columns].tolist())
+            if values is None:
+                distances, _ = getShortestPathTree(index, source)
+                values = [None if distances[column] == float('inf') else distances[column] for column in columns]
+            matrix.append(values)
+        return {'nodes': nodeList, 'distances': matrix, 'error': None}
+
+    def route(self, index, startNode, endNode):
+        source = self.nodeIndex[startNode]
+        target = self.nodeIndex[endNode]
+        distances = self.distanceRow(source).tolist()
+        exact = self.exactValues(index, [distances[target]])
+        if exact is None:
+            distances, predecessors = runDijkstra(index, source, target)
+            return formatPathResult(index, distances, predecessors, target)
+
+        result = formatPathResult(index, distances, self.predecessorRow(source).tolist(), target)
+        if exact[0] is not None:
+            result['distance'] = exact[0]
+        return result
+
+
+def loadDistanceMatrix(outputDir, index):
+    # A matrix that is missing, unreadable, from another format version or
+    # built for a different graph is ignored rather than served.
+    try:
+        matrix = DistanceMatrix(outputDir)
+    except (OSError, ValueError, KeyError):
+        return None
+    if matrix.fingerprint != graphFingerprint(index):
+        return None
+    return matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the all-pairs travel-time matrix for a road network.")
+    parser.add_argument('--network', default='data/city_network.json', help="network JSON, .ndjson/.csv, .npz archive or dataset.bin")
+    parser.add_argument('--output', default='data/city_network.matrix')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--predecessors', action='store_true', help="also store predecessor rows for path lookups")
+    parser.add_argument('--tile-rows', type=int, default=None, help="source rows per tile file")
+    args = parser.parse_args()
+
+    def log(completed, total, elapsed):
+        print(f"\r{completed}/{total} sources, {completed / elapsed if elapsed else 0:.1f} sources/sec", end='', flush=True)
+
+    manifest = buildDistanceMatrix(args.network, args.output, args.workers, args.predecessors, args.tile_rows, log)
+    print()
+    print(f"Wrote {manifest['numNodes']}x{manifest['numNodes']} matrix in {len(manifest['tiles'])} tile(s) to {args.output} "
+          f"({manifest['elapsedSeconds']}s, {manifest['sourcesPerSecond']} sources/sec)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+import numpy as np
+
+from core_algorithms.travelTimeProfiles import parseTravelTimeProfiles
+
+
+class GraphIndex:
+    def __init__(self, nodeIds, nodeNames, edgeU, edgeV, edgeWeights, version=None, csr=None, profiles=None, mixedWeights=False):
+        self.nodeIds = nodeIds
+        self.nodeNames = nodeNames
+        self.nodeIndex = {nodeId: i for i, nodeId in enumerate(nodeIds)}
+        self.version = version
+
+        self.edgeU = edgeU
+        self.edgeV = edgeV
+        self.edgeWeights = edgeWeights
+        # A network mixing int and float costs is stored as float64; its
+        # integral costs are handed back to the solvers as ints, so results
+        # print as they did for the JSON input (3, not 3.0).
+        self.mixedWeights = mixedWeights
+
+        if csr is None:
+            csr = buildCsrArrays(len(nodeIds), edgeU, edgeV, edgeWeights)
+
+        self.offsets = csr['offsets']
+        self.targets = csr['targets']
+        self.slotEdges = csr['slotEdges']
+        self.weights = csr['weights'] if 'weights' in csr else edgeWeights[self.slotEdges]
+        self.sortedEdgeIds = csr['sortedEdgeIds']
+
+        # Optional time-of-day travel-time profiles; static costs otherwise.
+        self.profiles = profiles
+
+        self._csrLists = None
+
+    @property
+    def numNodes(self):
+        return len(self.nodeIds)
+
+    @property
+    def numEdges(self):
+        return len(self.edgeU)
+
+    def csrLists(self):
+        # Views of the CSR arrays for the pure Python solver loops, where
+        # indexing a list or memoryview is much cheaper than indexing a NumPy
+        # array. See scalarView for memory-mapped indexes.
+        if self._csrLists is None:
+            weights = self.weightList(self.weights) if self.mixedWeights else scalarView(self.weights)
+            self._csrLists = (scalarView(self.offsets), scalarView(self.targets), weights, scalarView(self.slotEdges))
+        return self._csrLists
+
+    def weightList(self, weights):
+        values = weights.tolist()
+        if self.mixedWeights:
+            values = [int(weight) if weight.is_integer() else weight for weight in values]
+        return values
+
+    def edgeWeight(self, edgeId):
+        weight = self.edgeWeights[edgeId].item()
+        return int(weight) if self.mixedWeights and weight.is_integer() else weight
+
+    def edgeTuple(self, edgeId):
+        return (self.nodeIds[self.edgeU[edgeId]], self.nodeIds[self.edgeV[edgeId]], self.edgeWeight(edgeId))
+
+
+def scalarView(array):
+    # Indexing yields plain Python ints and floats either way. Arrays mapped
+    # from dataset.bin get a memoryview, so every worker keeps reading the
+    # shared page-cache copy instead of holding a private list copy;
+    # in-memory arrays get a list, which is somewhat faster to index.
+    if isinstance(array, np.memmap):
+        return memoryview(array)
+    return array.tolist()
+
+
+def buildCsrArrays(numNodes, edgeU, edgeV, edgeWeights):
+    numEdges = len(edgeU)
+
+    # Every undirected edge occupies two CSR slots, one per direction.
+    # slotEdges maps a slot back to its edge id.
+    sources = np.concatenate([edgeU, edgeV])
+    slotTargets = np.concatenate([edgeV, edgeU])
+    slotEdges = np.concatenate([np.arange(numEdges), np.arange(numEdges)])
+    order = np.argsort(sources, kind='stable')
+
+    offsets = np.zeros(numNodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=numNodes), out=offsets[1:])
+
+    return {
+        'offsets': offsets,
+        'targets': slotTargets[order].astype(np.int32),
+        'slotEdges': slotEdges[order].astype(np.int32),
+        'sortedEdgeIds': np.argsort(edgeWeights, kind='stable').astype(np.int32),
+    }
+
+
+def buildGraphIndex(graph, version=None):
+    nodes = graph['nodes']
+    edges = graph['edges']
+
+    nodeIds = [node['id'] for node in nodes]
+    nodeNames = [node.get('name', node['id']) for node in nodes]
+    nodeIndex = {nodeId: i for i, nodeId in enumerate(nodeIds)}
+
+    edgeU = np.fromiter((nodeIndex[u] for u, v, weight in edges), dtype=np.int32, count=len(edges))
+    edgeV = np.fromiter((nodeIndex[v] for u, v, weight in edges), dtype=np.int32, count=len(edges))
+    edgeWeights = np.array([weight for u, v, weight in edges])
+    if edgeWeights.dtype.kind not in 'if':
+        edgeWeights = edgeWeights.astype(np.float64)
+    mixedWeights = edgeWeights.dtype.kind == 'f' and any(type(weight) is int for u, v, weight in edges)
+
+    index = GraphIndex(nodeIds, nodeNames, edgeU, edgeV, edgeWeights, version, mixedWeights=mixedWeights)
+    if graph.get('profiles'):
+        index.profiles = parseTravelTimeProfiles(index, graph['profiles'])
+    return index
+
+
+def asGraphIndex(graph):
+    if isinstance(graph, GraphIndex):
+        return graph
+    return buildGraphIndex(graph)
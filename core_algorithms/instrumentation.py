@@ -0,0 +1,183 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Process-wide metrics in a Prometheus-friendly shape, plus an optional
+# per-request trace. Solvers count into local ints inside their hot loops and
+# report once per call through recordSolverStats, so the bookkeeping stays
+# out of the inner loops.
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[position] += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self.help = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted(labels.items())))
+
+    def describe(self, name, text):
+        self.help[name] = text
+
+    def increment(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def registerGauge(self, name, read, text=None):
+        # Gauges are read lazily at scrape time; read returns a value or a
+        # list of (labels, value) pairs.
+        self.gauges[name] = read
+        if text:
+            self.help[name] = text
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def render(self):
+        lines = []
+
+        def header(name, kind):
+            if name in self.help:
+                lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, (histogram.buckets, list(histogram.counts), histogram.count, histogram.sum)) for key, histogram in self.histograms.items())
+
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                header(name, 'counter')
+            lines.append(f"{name}{formatLabels(labels)} {formatValue(value)}")
+
+        for (name, labels), (buckets, counts, count, total) in histograms:
+            if name not in seen:
+                seen.add(name)
+                header(name, 'histogram')
+            for bound, bucketCount in zip(buckets, counts):
+                lines.append(f"{name}_bucket{formatLabels(labels + (('le', formatValue(bound)),))} {bucketCount}")
+            lines.append(f"{name}_bucket{formatLabels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{formatLabels(labels)} {formatValue(total)}")
+            lines.append(f"{name}_count{formatLabels(labels)} {count}")
+
+        for name, read in sorted(self.gauges.items()):
+            value = read()
+            header(name, 'gauge')
+            samples = value if isinstance(value, list) else [((), value)]
+            for labels, sample in samples:
+                if sample is not None:
+                    lines.append(f"{name}{formatLabels(tuple(labels))} {formatValue(sample)}")
+
+        return "\n".join(lines) + "\n"
+
+
+def formatLabels(labels):
+    if not labels:
+        return ''
+    escaped = [(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for key, value in labels]
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def formatValue(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(int(value))
+
+
+registry = MetricsRegistry()
+registry.describe('urban_planner_stage_seconds', "Time spent in each request stage.")
+registry.describe('urban_planner_solver_calls_total', "Solver invocations.")
+registry.describe('urban_planner_solver_ops_total', "Solver work counters, by solver and counter.")
+registry.describe('urban_planner_requests_total', "HTTP requests by endpoint and status.")
+registry.describe('urban_planner_request_seconds', "HTTP request latency by endpoint.")
+
+_local = threading.local()
+
+
+class RequestTrace:
+    def __init__(self):
+        self.startedAt = time.perf_counter()
+        self.stages = []
+        self.counters = {}
+
+    def toDict(self):
+        return {
+            'totalMs': round((time.perf_counter() - self.startedAt) * 1000, 3),
+            'stages': [{'stage': name, 'ms': round(seconds * 1000, 3)} for name, seconds in self.stages],
+            'counters': self.counters,
+        }
+
+
+def beginTrace():
+    _local.trace = RequestTrace()
+    return _local.trace
+
+
+def endTrace():
+    trace = getattr(_local, 'trace', None)
+    _local.trace = None
+    return trace
+
+
+def currentTrace():
+    return getattr(_local, 'trace', None)
+
+
+@contextmanager
+def stage(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        registry.observe('urban_planner_stage_seconds', elapsed, stage=name)
+        trace = currentTrace()
+        if trace is not None:
+            trace.stages.append((name, elapsed))
+
+
+def recordSolverStats(solver, **counters):
+    registry.increment('urban_planner_solver_calls_total', solver=solver)
+    for counter, amount in counters.items():
+        registry.increment('urban_planner_solver_ops_total', amount, solver=solver, counter=counter)
+
+    trace = currentTrace()
+    if trace is not None:
+        solverCounters = trace.counters.setdefault(solver, {'calls': 0})
+        solverCounters['calls'] += 1
+        for counter, amount in counters.items():
+            solverCounters[counter] = solverCounters.get(counter, 0) + amount
@@ -0,0 +1,360 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from core_algorithms.datasetStore import DatasetStore
+from core_algorithms.knapsackSolver import solveBudgetSweep, solveKnapsackExact, splitBudgetSweepProjects
+from core_algorithms.nQueenPlacement import constructQueenPlacement, countFromFirstColumn, findSensorPlacement
+from core_algorithms.shortestPath import runDijkstra
+
+JOB_WORKERS_ENV = 'URBAN_PLANNER_JOB_WORKERS'
+DEFAULT_JOB_TIMEOUT = 600
+MAX_FINISHED_JOBS = 256
+DISTANCE_ROWS_PER_CHUNK = 16
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+TIMED_OUT = 'timeout'
+FINISHED_STATES = (DONE, FAILED, CANCELLED, TIMED_OUT)
+
+
+# Worker-side helpers. These run inside the pool processes, which open the
+# dataset themselves (memory-mapped when dataset.bin is fresh) instead of
+# receiving it pickled with every chunk.
+
+_workerStores = {}
+
+
+def workerSnapshot(dataDir, contentHash):
+    store = _workerStores.get(dataDir)
+    if store is None:
+        store = _workerStores[dataDir] = DatasetStore(dataDir)
+    snapshot = store.get()
+    if snapshot.contentHash != contentHash:
+        raise RuntimeError("The dataset changed while the job was running; resubmit it.")
+    return snapshot
+
+
+def runKnapsackChunk(dataDir, contentHash, maxBudget, engine):
+    return solveKnapsackExact(workerSnapshot(dataDir, contentHash).projects, maxBudget, engine)
+
+
+def runBudgetSweepChunk(dataDir, contentHash, maxBudget, budgets):
+    return solveBudgetSweep(workerSnapshot(dataDir, contentHash).projects, maxBudget, budgets)
+
+
+def runDistanceRowsChunk(dataDir, contentHash, sources, columns):
+    index = workerSnapshot(dataDir, contentHash).graphIndex
+    rows = []
+    for source in sources:
+        distances, _ = runDijkstra(index, source)
+        rows.append([None if distances[column] == float('inf') else distances[column] for column in columns])
+    return rows
+
+
+# Job planners run in the web process. Each returns the chunks to submit and
+# a function combining the chunk results; progress is chunks done / total.
+
+def planKnapsackJob(dataset, dataDir, params):
+    maxBudget = int(params['budget'])
+    engine = params.get('engine', 'auto')
+    if engine not in ('auto', 'dp', 'branchAndBound'):
+        raise ValueError(f"Unknown knapsack engine: {engine}")
+    return [(runKnapsackChunk, (dataDir, dataset.contentHash, maxBudget, engine))], lambda results: results[0]
+
+
+def planBudgetSweepJob(dataset, dataDir, params):
+    maxBudget = int(params['maxBudget'])
+    budgets = params.get('budgets')
+    if budgets is not None and not isinstance(budgets, list):
+        raise ValueError("'budgets' must be a list of integers.")
+    splitBudgetSweepProjects(dataset.projects, maxBudget)
+    return [(runBudgetSweepChunk, (dataDir, dataset.contentHash, maxBudget, budgets))], lambda results: results[0]
+
+
+def planSensorJob(dataset, dataDir, params):
+    n = int(params['n'])
+    if n < 1:
+        raise ValueError("'n' must be at least 1.")
+    if constructQueenPlacement(n) is None:
+        return [], lambda results: findSensorPlacement(n, countSolutions=False)
+
+    # Same mirror symmetry as countNQueens: one chunk per first-row column
+    # in the left half, plus the middle column for odd n.
+    halfColumns = list(range(n // 2))
+    middleColumn = [n // 2] if n % 2 else []
+    chunks = [(countFromFirstColumn, (n, col)) for col in halfColumns + middleColumn]
+
+    def combine(results):
+        result = findSensorPlacement(n, countSolutions=False)
+        result['count'] = 2 * sum(results[:len(halfColumns)]) + sum(results[len(halfColumns):])
+        return result
+
+    return chunks, combine
+
+
+def planDistanceMatrixJob(dataset, dataDir, params):
+    index = dataset.graphIndex
+    nodeList = params.get('nodes')
+    if nodeList is None:
+        nodeList = list(index.nodeIds)
+    if not isinstance(nodeList, list):
+        raise ValueError("'nodes' must be a list of node ids.")
+    nodeList = [str(node).upper() for node in nodeList]
+    invalidNodes = [node for node in nodeList if node not in index.nodeIndex]
+    if invalidNodes:
+        raise ValueError(f"Invalid Node ({', '.join(invalidNodes)})")
+
+    columns = [index.nodeIndex[node] for node in nodeList]
+    chunks = [
+        (runDistanceRowsChunk, (dataDir, dataset.contentHash, columns[start:start + DISTANCE_ROWS_PER_CHUNK], columns))
+        for start in range(0, len(columns), DISTANCE_ROWS_PER_CHUNK)
+    ]
+
+    def combine(results):
+        return {'nodes': nodeList, 'distances': [row for rows in results for row in rows], 'error': None}
+
+    return chunks, combine
+
+
+JOB_KINDS = {
+    'knapsack': planKnapsackJob,
+    'budgetSweep': planBudgetSweepJob,
+    'sensors': planSensorJob,
+    'distanceMatrix': planDistanceMatrixJob,
+}
+
+
+class Job:
+    def __init__(self, kind, params, timeout):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.timeout = timeout
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.createdAt = time.time()
+        self.startedAt = None
+        self.finishedAt = None
+        self.chunks = []
+        self.chunkResults = []
+        self.completedChunks = 0
+        self.futures = []
+        self.combine = None
+        self.timer = None
+
+    @property
+    def isFinished(self):
+        return self.status in FINISHED_STATES
+
+    def toDict(self, includeResult=False):
+        total = len(self.chunks)
+        status = self.status
+        if status == QUEUED and any(future is not None and future.running() for future in self.futures):
+            status = RUNNING
+        job = {
+            'id': self.id,
+            'kind': self.kind,
+            'params': self.params,
+            'status': status,
+            'progress': {
+                'completed': self.completedChunks,
+                'total': total,
+                'fraction': round(self.completedChunks / total, 4) if total else (1.0 if self.status == DONE else 0.0),
+            },
+            'error': self.error,
+            'createdAt': self.createdAt,
+            'startedAt': self.startedAt,
+            'finishedAt': self.finishedAt,
+            'timeout': self.timeout,
+        }
+        if includeResult:
+            job['result'] = self.result
+        return job
+
+
+class JobQueue:
+    # Long solves run in a local process pool, split into chunks so progress
+    # can be reported. Chunks wait in the queue's own FIFO and only as many
+    # as there are workers are handed to the pool, so a cancel or timeout
+    # just drops the job's waiting chunks. A chunk that is already running
+    # cannot be interrupted: its pool is killed and recreated, and the other
+    # jobs' running chunks go back to the front of the queue. A job reports
+    # cancelled or timeout only once none of its chunks is still running.
+
+    def __init__(self, maxWorkers=None, dataDir='data', defaultTimeout=DEFAULT_JOB_TIMEOUT, maxFinishedJobs=MAX_FINISHED_JOBS):
+        self.maxWorkers = maxWorkers or os.cpu_count() or 1
+        self.dataDir = dataDir
+        self.defaultTimeout = defaultTimeout
+        self.maxFinishedJobs = maxFinishedJobs
+        self._jobs = OrderedDict()
+        # A future that is already done runs its done-callback on the spot,
+        # which takes the lock again.
+        self._lock = threading.RLock()
+        self._executor = None
+        self._pending = deque()
+        self._running = {}
+
+    def _getExecutor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.maxWorkers)
+        return self._executor
+
+    def submit(self, kind, params, dataset, timeout=None):
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if timeout is not None and timeout <= 0:
+            raise ValueError("'timeout' must be positive.")
+        try:
+            chunks, combine = JOB_KINDS[kind](dataset, self.dataDir, params)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid parameters for a {kind} job: {e}")
+
+        job = Job(kind, params, timeout or self.defaultTimeout)
+        job.combine = combine
+        job.chunks = chunks
+        job.chunkResults = [None] * len(chunks)
+        job.futures = [None] * len(chunks)
+
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evictFinished()
+            if not chunks:
+                self._finish(job)
+                return job
+
+            job.timer = threading.Timer(job.timeout, self._expire, (job.id,))
+            job.timer.daemon = True
+            job.timer.start()
+            self._pending.extend((job, position) for position in range(len(chunks)))
+            self._dispatch()
+        return job
+
+    def _dispatch(self):
+        while self._pending and len(self._running) < self.maxWorkers:
+            job, position = self._pending.popleft()
+            if job.isFinished:
+                continue
+            function, args = job.chunks[position]
+            future = self._getExecutor().submit(function, *args)
+            job.futures[position] = future
+            self._running[future] = (job, position)
+            future.add_done_callback(lambda future, job=job, position=position: self._onChunkDone(job, position, future))
+
+    def _onChunkDone(self, job, position, future):
+        with self._lock:
+            # Futures of a killed pool were already put back in the queue.
+            if self._running.pop(future, None) is None:
+                return
+            if not job.isFinished:
+                self._collectChunk(job, position, future)
+            self._dispatch()
+
+    def _collectChunk(self, job, position, future):
+        try:
+            job.chunkResults[position] = future.result()
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            self._stop(job, FAILED)
+            return
+
+        if job.startedAt is None:
+            job.startedAt = time.time()
+        job.status = RUNNING
+        job.completedChunks += 1
+        if job.completedChunks == len(job.chunks):
+            self._finish(job)
+
+    def _finish(self, job):
+        try:
+            job.result = job.combine(job.chunkResults)
+            job.status = DONE
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = FAILED
+        self._stop(job, job.status)
+
+    def _stop(self, job, status):
+        if job.timer is not None:
+            job.timer.cancel()
+        if any(owner is job for owner, _ in self._running.values()):
+            self._restartPool(job)
+        job.status = status
+        job.finishedAt = time.time()
+        job.chunkResults = None
+
+    def _restartPool(self, stoppedJob):
+        executor, self._executor = self._executor, None
+        requeued = [(job, position) for job, position in self._running.values() if job is not stoppedJob]
+        self._pending.extendleft(reversed(requeued))
+        self._running.clear()
+
+        # ProcessPoolExecutor has no public way to stop a running call. The
+        # old futures fail with BrokenProcessPool, which _onChunkDone ignores.
+        processes = list(executor._processes.values())
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        executor.shutdown(wait=False)
+
+    def _expire(self, jobId):
+        with self._lock:
+            job = self._jobs.get(jobId)
+            if job is not None and not job.isFinished:
+                job.error = f"Job exceeded its {job.timeout}s timeout."
+                self._stop(job, TIMED_OUT)
+                self._dispatch()
+
+    def _evictFinished(self):
+        finished = [jobId for jobId, job in self._jobs.items() if job.isFinished]
+        for jobId in finished[:max(0, len(finished) - self.maxFinishedJobs)]:
+            del self._jobs[jobId]
+
+    def get(self, jobId):
+        with self._lock:
+            return self._jobs.get(jobId)
+
+    def cancel(self, jobId):
+        with self._lock:
+            job = self._jobs.get(jobId)
+            if job is not None and not job.isFinished:
+                self._stop(job, CANCELLED)
+                self._dispatch()
+            return job
+
+    def listJobs(self):
+        with self._lock:
+            return [job.toDict() for job in self._jobs.values()]
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._pending.clear()
+            self._running.clear()
+            for job in self._jobs.values():
+                if not job.isFinished:
+                    self._stop(job, CANCELLED)
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_defaultQueue = None
+_defaultQueueLock = threading.Lock()
+
+
+def getJobQueue():
+    global _defaultQueue
+    if _defaultQueue is None:
+        with _defaultQueueLock:
+            if _defaultQueue is None:
+                workers = os.environ.get(JOB_WORKERS_ENV)
+                _defaultQueue = JobQueue(maxWorkers=int(workers) if workers else None)
+    return _defaultQueue
@@ -1,8 +1,16 @@
+import bisect
+import time
+
+import numpy as np
+
+from core_algorithms.instrumentation import recordSolverStats
+
 def solveKnapsack(projects, maxBudget):
     if maxBudget <= 0 or len(projects) == 0:
         return {
             'selectedProjects': [],
             'totalBenefit': 0,
+            'maxBenefit': 0,
             'totalCost': 0,
             'remainingBudget': maxBudget
         }
@@ -37,6 +45,257 @@ def solveKnapsack(projects, maxBudget):
     return {
         'selectedProjects': selectedProjects,
         'totalBenefit': totalBenefit,
+        'maxBenefit': totalBenefit,
         'totalCost': totalCost,
         'remainingBudget': remainingBudget
-    }
\ No newline at end of file
+    }
+
+DP_CELL_LIMIT = 50_000_000
+
+def buildKnapsackResult(selectedProjects, maxBudget, engine, startedAt):
+    totalCost = sum(project['cost'] for project in selectedProjects)
+    totalBenefit = sum(project['benefit'] for project in selectedProjects)
+    return {
+        'selectedProjects': [project['name'] for project in selectedProjects],
+        'totalBenefit': totalBenefit,
+        'maxBenefit': totalBenefit,
+        'totalCost': totalCost,
+        'remainingBudget': maxBudget - totalCost,
+        'engine': engine,
+        'elapsedMs': round((time.perf_counter() - startedAt) * 1000, 3)
+    }
+
+def buildDecisionTable(costs, benefits, capacity):
+    best = np.zeros(capacity + 1, dtype=benefits.dtype)
+    # One packed row per item marks the capacities at which taking the item
+    # improved the optimum; that is all reconstruction needs.
+    decisionBits = np.zeros((len(costs), (capacity + 8) // 8), dtype=np.uint8)
+    taken = np.zeros(capacity + 1, dtype=bool)
+
+    for i in range(len(costs)):
+        cost = int(costs[i])
+        candidate = best[:capacity + 1 - cost] + benefits[i]
+        improves = candidate > best[cost:]
+        best[cost:][improves] = candidate[improves]
+
+        taken[:cost] = False
+        taken[cost:] = improves
+        decisionBits[i] = np.packbits(taken)
+
+    return decisionBits, best
+
+def solveByDynamicProgramming(costs, benefits, capacity):
+    decisionBits, best = buildDecisionTable(costs, benefits, capacity)
+    recordSolverStats('knapsackDP', tableCells=len(costs) * (capacity + 1))
+    return reconstructSelection(costs, decisionBits, capacity), best
+
+def solveByBranchAndBound(costs, benefits, capacity):
+    order = sorted(range(len(costs)), key=lambda i: benefits[i] / costs[i], reverse=True)
+    sortedCosts = [costs[i] for i in order]
+    sortedBenefits = [benefits[i] for i in order]
+    n = len(order)
+
+    prefixCosts = [0] * (n + 1)
+    prefixBenefits = [0] * (n + 1)
+    for k in range(n):
+        prefixCosts[k + 1] = prefixCosts[k] + sortedCosts[k]
+        prefixBenefits[k + 1] = prefixBenefits[k] + sortedBenefits[k]
+
+    def upperBound(position, value, room):
+        # Greedy LP relaxation over the remaining items: take whole items in
+        # ratio order, then a fraction of the first one that does not fit.
+        limit = bisect.bisect_right(prefixCosts, prefixCosts[position] + room, position) - 1
+        bound = value + prefixBenefits[limit] - prefixBenefits[position]
+        if limit < n:
+            room -= prefixCosts[limit] - prefixCosts[position]
+            bound += sortedBenefits[limit] * room / sortedCosts[limit]
+        return bound
+
+    bestValue = 0
+    bestChoice = None
+    room = capacity
+    for k in range(n):
+        if sortedCosts[k] <= room:
+            room -= sortedCosts[k]
+            bestValue += sortedBenefits[k]
+            bestChoice = (k, bestChoice)
+
+    # Depth-first search with an explicit stack; chosen items are kept as a
+    # shared linked list so branching never copies the partial selection.
+    stack = [(0, 0, capacity, None)]
+    nodesExplored = 0
+    while stack:
+        position, value, room, chosen = stack.pop()
+        nodesExplored += 1
+
+        if value > bestValue:
+            bestValue = value
+            bestChoice = chosen
+
+        if position == n or upperBound(position, value, room) <= bestValue:
+            continue
+
+        stack.append((position + 1, value, room, chosen))
+        if sortedCosts[position] <= room:
+            stack.append((position + 1, value + sortedBenefits[position], room - sortedCosts[position], (position, chosen)))
+
+    recordSolverStats('knapsackBranchAndBound', nodesExplored=nodesExplored)
+
+    selected = []
+    while bestChoice is not None:
+        position, bestChoice = bestChoice
+        selected.append(order[position])
+
+    selected.sort()
+    return selected
+
+def solveKnapsackExact(projects, maxBudget, engine='auto', cellLimit=DP_CELL_LIMIT):
+    startedAt = time.perf_counter()
+
+    eligible = [project for project in projects if 0 <= project['cost'] <= maxBudget and project['benefit'] > 0]
+    # Zero-cost projects fit any budget, so they are always taken and only
+    # the rest go through the DP table or branch and bound.
+    freeProjects = [project for project in eligible if project['cost'] == 0]
+    candidates = [project for project in eligible if project['cost'] > 0]
+    if len(candidates) == 0:
+        return buildKnapsackResult(freeProjects, maxBudget, 'none', startedAt)
+
+    integerCosts = all(float(project['cost']).is_integer() for project in candidates) and float(maxBudget).is_integer()
+    if engine == 'auto':
+        fitsTable = len(candidates) * (int(maxBudget) + 1) <= cellLimit
+        engine = 'dp' if integerCosts and fitsTable else 'branchAndBound'
+    elif engine == 'dp' and not integerCosts:
+        raise ValueError("The DP engine needs integer project costs and budget.")
+
+    if engine == 'dp':
+        costs = np.array([int(project['cost']) for project in candidates], dtype=np.int64)
+        benefits = np.array([project['benefit'] for project in candidates])
+        selected, _ = solveByDynamicProgramming(costs, benefits, int(maxBudget))
+    elif engine == 'branchAndBound':
+        costs = [project['cost'] for project in candidates]
+        benefits = [project['benefit'] for project in candidates]
+        selected = solveByBranchAndBound(costs, benefits, maxBudget)
+    else:
+        raise ValueError(f"Unknown knapsack engine: {engine}")
+
+    chosen = set(map(id, freeProjects + [candidates[i] for i in selected]))
+    return buildKnapsackResult([project for project in eligible if id(project) in chosen], maxBudget, engine, startedAt)
+
+
+def reconstructSelection(costs, decisionBits, capacity):
+    selected = []
+    remaining = capacity
+    for i in range(len(costs) - 1, -1, -1):
+        if (decisionBits[i, remaining >> 3] >> (7 - (remaining & 7))) & 1:
+            selected.append(i)
+            remaining -= int(costs[i])
+
+    selected.reverse()
+    return selected
+
+def splitBudgetSweepProjects(projects, maxBudget):
+    eligible = [project for project in projects if 0 <= project['cost'] <= maxBudget and project['benefit'] > 0]
+    freeProjects = [project for project in eligible if project['cost'] == 0]
+    candidates = [project for project in eligible if project['cost'] > 0]
+    if maxBudget < 0 or not all(float(project['cost']).is_integer() for project in candidates):
+        raise ValueError("A budget sweep needs a non-negative budget and integer project costs.")
+    # The curve alone holds maxBudget + 1 entries, so an empty portfolio
+    # still counts as one row of the table.
+    if max(len(candidates), 1) * (int(maxBudget) + 1) > DP_CELL_LIMIT:
+        raise ValueError("maxBudget is too large for the budget sweep DP table.")
+    return eligible, freeProjects, candidates
+
+def solveBudgetSweep(projects, maxBudget, budgets=None):
+    startedAt = time.perf_counter()
+
+    eligible, freeProjects, candidates = splitBudgetSweepProjects(projects, maxBudget)
+    maxBudget = int(maxBudget)
+    costs = np.array([int(project['cost']) for project in candidates], dtype=np.int64)
+    benefits = np.array([project['benefit'] for project in candidates] or [0])[:len(candidates)]
+
+    # best[b] of the final DP row is already the optimum for budget b, so the
+    # whole curve costs one DP pass rather than one solve per budget.
+    # Zero-cost projects are in every portfolio and lift the whole curve.
+    decisionBits, best = buildDecisionTable(costs, benefits, maxBudget)
+    freeBenefit = sum(project['benefit'] for project in freeProjects)
+
+    portfolios = {}
+    for budget in budgets or []:
+        budget = int(budget)
+        if not 0 <= budget <= maxBudget:
+            continue
+        selected = reconstructSelection(costs, decisionBits, budget)
+        chosen = set(map(id, freeProjects + [candidates[i] for i in selected]))
+        portfolios[budget] = buildKnapsackResult([project for project in eligible if id(project) in chosen], budget, 'dp', startedAt)
+
+    return {
+        'budgets': list(range(maxBudget + 1)),
+        'benefitCurve': (best + freeBenefit).tolist() if freeProjects else best.tolist(),
+        'portfolios': portfolios,
+        'engine': 'dp',
+        'elapsedMs': round((time.perf_counter() - startedAt) * 1000, 3)
+    }
+
+def solveMultiConstraintKnapsack(projects, limits):
+    startedAt = time.perf_counter()
+
+    resources = list(limits)
+    capacities = [int(limits[resource]) for resource in resources]
+    if not resources or min(capacities) < 0:
+        raise ValueError("Provide at least one non-negative resource limit.")
+    for project in projects:
+        for resource in resources:
+            if not float(project.get(resource, 0)).is_integer():
+                raise ValueError(f"Resource '{resource}' must be an integer for every project.")
+
+    eligible = [
+        project for project in projects
+        if project['benefit'] > 0
+        and all(0 <= project.get(resource, 0) <= capacity for resource, capacity in zip(resources, capacities))
+    ]
+    # Projects that use none of the constrained resources are always worth
+    # taking, so only the rest go through the DP table.
+    freeProjects = [project for project in eligible if not any(project.get(resource, 0) > 0 for resource in resources)]
+    candidates = [project for project in eligible if any(project.get(resource, 0) > 0 for resource in resources)]
+
+    tableCells = int(np.prod([capacity + 1 for capacity in capacities]))
+    if len(candidates) * tableCells > DP_CELL_LIMIT:
+        raise ValueError("Constraint limits are too large for the multi-constraint DP table.")
+
+    # The DP table has one axis per resource; each project shifts it along
+    # every axis by its demand and keeps the better of take / skip.
+    best = np.zeros([capacity + 1 for capacity in capacities], dtype=np.array([p['benefit'] for p in candidates] or [0]).dtype)
+    decisions = []
+    for project in candidates:
+        demand = tuple(int(project.get(resource, 0)) for resource in resources)
+        source = tuple(slice(0, capacity + 1 - need) for capacity, need in zip(capacities, demand))
+        destination = tuple(slice(need, None) for need in demand)
+
+        candidate = best[source] + project['benefit']
+        improves = candidate > best[destination]
+        best[destination][improves] = candidate[improves]
+
+        taken = np.zeros(best.shape, dtype=bool)
+        taken[destination] = improves
+        decisions.append(np.packbits(taken))
+
+    selected = []
+    remaining = list(capacities)
+    for i in range(len(candidates) - 1, -1, -1):
+        flatIndex = int(np.ravel_multi_index(remaining, best.shape))
+        if (decisions[i][flatIndex >> 3] >> (7 - (flatIndex & 7))) & 1:
+            selected.append(candidates[i])
+            remaining = [room - int(candidates[i].get(resource, 0)) for room, resource in zip(remaining, resources)]
+
+    selected.reverse()
+    chosen = set(map(id, freeProjects + selected))
+    selected = [project for project in eligible if id(project) in chosen]
+    return {
+        'selectedProjects': [project['name'] for project in selected],
+        'totalBenefit': sum(project['benefit'] for project in selected),
+        'maxBenefit': sum(project['benefit'] for project in selected),
+        'usage': {resource: sum(project.get(resource, 0) for project in selected) for resource in resources},
+        'limits': dict(zip(resources, capacities)),
+        'engine': 'dp',
+        'elapsedMs': round((time.perf_counter() - startedAt) * 1000, 3)
+    }
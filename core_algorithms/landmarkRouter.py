@@ -0,0 +1,212 @@
+import argparse
+import hashlib
+import heapq
+import json
+import zipfile
+
+import numpy as np
+
+from core_algorithms.graphIndex import buildGraphIndex
+from core_algorithms.instrumentation import recordSolverStats
+from core_algorithms.shortestPath import runDijkstra, solveDijkstra
+
+FORMAT_VERSION = 1
+
+
+def graphFingerprint(index):
+    digest = hashlib.sha1()
+    digest.update("\x00".join(index.nodeIds).encode())
+    digest.update(np.ascontiguousarray(index.edgeU).tobytes())
+    digest.update(np.ascontiguousarray(index.edgeV).tobytes())
+    digest.update(np.ascontiguousarray(index.edgeWeights, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class LandmarkRouter:
+    def __init__(self, index, landmarks, landmarkDistances):
+        self.index = index
+        self.landmarks = landmarks
+        self.landmarkDistances = landmarkDistances
+        # One tuple of landmark distances per node, so the heuristic can be
+        # evaluated without touching NumPy inside the search loop.
+        self._nodeVectors = landmarkDistances.T.tolist()
+        # Float landmark distances carry rounding error, so the bounds can be
+        # off by a few ulps; the search keeps settling within this margin.
+        finite = landmarkDistances[np.isfinite(landmarkDistances)]
+        self._slack = 1e-9 * float(finite.max()) if finite.size else 0.0
+
+    def _heuristic(self, targetVector, node):
+        best = 0
+        for toTarget, toNode in zip(targetVector, self._nodeVectors[node]):
+            if toTarget == float('inf') or toNode == float('inf'):
+                continue
+            bound = abs(toTarget - toNode)
+            if bound > best:
+                best = bound
+        return best
+
+    def boundTo(self, target):
+        # Lower bound on the static distance from any node to target.
+        targetVector = self._nodeVectors[target]
+        return lambda node: self._heuristic(targetVector, node)
+
+    def search(self, source, target):
+        offsets, targets, weights, _ = self.index.csrLists()
+        targetVector = self._nodeVectors[target]
+
+        distances = {source: 0}
+        predecessors = {source: -1}
+        settled = {}
+        estimates = {}
+        priorityQueue = [(self._heuristic(targetVector, source), source)]
+        targetDistance = float('inf')
+        heapPushes = 1
+        levelEdges = False
+
+        # Keep settling every node whose estimate does not exceed the target
+        # distance. That covers every node on every shortest path, so each
+        # predecessor can be chosen the way solveDijkstra would: among equal
+        # distances, the neighbour with the smallest (distance, node) key,
+        # which is the one Dijkstra settles first. A node whose distance
+        # improves after it was settled (float bounds are not exactly
+        # consistent) is settled again.
+        while priorityQueue:
+            estimate, currentNode = heapq.heappop(priorityQueue)
+            if estimate > targetDistance + self._slack:
+                break
+            currentDistance = distances[currentNode]
+            if settled.get(currentNode) == currentDistance:
+                continue
+
+            settled[currentNode] = currentDistance
+            if currentNode == target:
+                targetDistance = currentDistance
+            currentKey = (currentDistance, currentNode)
+
+            for slot in range(offsets[currentNode], offsets[currentNode + 1]):
+                neighbor = targets[slot]
+                distance = currentDistance + weights[slot]
+                known = distances.get(neighbor, float('inf'))
+
+                if distance < known:
+                    distances[neighbor] = distance
+                    predecessors[neighbor] = currentNode
+                    if neighbor not in estimates:
+                        estimates[neighbor] = self._heuristic(targetVector, neighbor)
+                    heapq.heappush(priorityQueue, (distance + estimates[neighbor], neighbor))
+                    heapPushes += 1
+                elif distance == known and neighbor != source:
+                    previous = predecessors[neighbor]
+                    if currentKey < (distances[previous], previous):
+                        predecessors[neighbor] = currentNode
+
+                # An edge that does not add to the distance (a zero-cost road,
+                # or a weight lost to float rounding) makes Dijkstra's settle
+                # order depend on the search history, not just on the key.
+                if distance == currentDistance:
+                    levelEdges = True
+
+        recordSolverStats('landmark', nodesSettled=len(settled), heapPushes=heapPushes)
+        return distances, predecessors, settled, levelEdges
+
+    def solve(self, startNode, endNode):
+        nodeIndex = self.index.nodeIndex
+        if startNode not in nodeIndex or endNode not in nodeIndex:
+            return {'path': f"Error: Invalid Node ({startNode} or {endNode})", 'distance': 0}
+
+        source = nodeIndex[startNode]
+        target = nodeIndex[endNode]
+        distances, predecessors, settled, levelEdges = self.search(source, target)
+
+        if target not in settled:
+            return {'path': "No path found.", 'distance': 0}
+        if levelEdges:
+            return solveDijkstra(self.index, startNode, endNode)
+
+        path = []
+        current = target
+        while current != -1:
+            path.append(self.index.nodeIds[current])
+            current = predecessors[current]
+
+        path.reverse()
+        return {
+            'path': " -> ".join(path),
+            'distance': distances[target]
+        }
+
+    def save(self, path):
+        np.savez(
+            path,
+            formatVersion=np.array(FORMAT_VERSION),
+            fingerprint=np.array(graphFingerprint(self.index)),
+            landmarks=np.asarray(self.landmarks, dtype=np.int32),
+            landmarkDistances=self.landmarkDistances,
+        )
+
+
+def selectLandmarks(index, numLandmarks):
+    # Farthest-point selection: each new landmark is the node farthest from
+    # all landmarks chosen so far, which gives tight bounds on road networks.
+    numLandmarks = min(numLandmarks, index.numNodes)
+    landmarks = []
+    rows = []
+    closest = np.full(index.numNodes, np.inf)
+    candidate = 0
+
+    for _ in range(numLandmarks):
+        distances, _ = runDijkstra(index, candidate)
+        row = np.array(distances, dtype=np.float64)
+        landmarks.append(candidate)
+        rows.append(row)
+
+        closest = np.minimum(closest, row)
+        # Unreached nodes (other components) are the best next landmarks.
+        scores = np.where(np.isinf(closest), np.finfo(np.float64).max, closest)
+        scores[landmarks] = -1
+        candidate = int(np.argmax(scores))
+        if scores[candidate] < 0:
+            break
+
+    return landmarks, np.vstack(rows) if rows else np.empty((0, index.numNodes))
+
+
+def buildLandmarkRouter(index, numLandmarks=8):
+    landmarks, landmarkDistances = selectLandmarks(index, numLandmarks)
+    return LandmarkRouter(index, landmarks, landmarkDistances)
+
+
+def loadLandmarkRouter(path, index):
+    # Landmarks are optional: a missing, truncated or corrupt file is
+    # ignored like a stale one.
+    try:
+        with np.load(path) as data:
+            if int(data['formatVersion']) != FORMAT_VERSION:
+                return None
+            if str(data['fingerprint']) != graphFingerprint(index):
+                return None
+            landmarks = data['landmarks'].tolist()
+            landmarkDistances = data['landmarkDistances']
+    except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+
+    return LandmarkRouter(index, landmarks, landmarkDistances)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute ALT landmark distances for the city network.")
+    parser.add_argument('--network', default='data/city_network.json')
+    parser.add_argument('--output', default='data/city_network.landmarks.npz')
+    parser.add_argument('--landmarks', type=int, default=8)
+    args = parser.parse_args()
+
+    with open(args.network) as f:
+        index = buildGraphIndex(json.load(f))
+
+    router = buildLandmarkRouter(index, args.landmarks)
+    router.save(args.output)
+    print(f"Wrote {len(router.landmarks)} landmarks for {index.numNodes} nodes to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import importlib
+import threading
+
+# Solver modules are registered by name and imported on first attribute
+# access, so a cold worker only pays for the modules its requests touch.
+
+_registered = {}
+_registeredLock = threading.Lock()
+
+
+class LazyModule:
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            # import_module holds the import lock, so racing threads get the
+            # same module object.
+            module = self.__dict__['_module'] = importlib.import_module(self._name)
+        return module
+
+    def __getattr__(self, attribute):
+        return getattr(self.load(), attribute)
+
+    def __setattr__(self, attribute, value):
+        raise AttributeError(f"{self._name} is a lazy module reference and is read-only.")
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazyModule(name):
+    with _registeredLock:
+        module = _registered.get(name)
+        if module is None:
+            module = _registered[name] = LazyModule(name)
+    return module
+
+
+def loadRegisteredModules():
+    with _registeredLock:
+        modules = list(_registered.values())
+    return [module.load() for module in modules]
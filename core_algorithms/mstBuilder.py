@@ -1,12 +1,21 @@
+import bisect
+
+from core_algorithms.graphIndex import asGraphIndex, scalarView
+from core_algorithms.instrumentation import recordSolverStats
+
 class UnionFind:
     def __init__(self, nodes):
         self.parent = {node: node for node in nodes}
         self.rank = {node: 0 for node in nodes}
     
     def find(self, node):
-        if self.parent[node] != node:
-            self.parent[node] = self.find(self.parent[node])
-        return self.parent[node]
+        root = node
+        while self.parent[root] != root:
+            root = self.parent[root]
+        
+        while self.parent[node] != root:
+            self.parent[node], node = root, self.parent[node]
+        return root
     
     def union(self, node1, node2):
         root1 = self.find(node1)
@@ -25,29 +34,289 @@ class UnionFind:
         
         return True
 
-def buildMST(graph):
-    nodes = graph['nodes']
-    edges = graph['edges']
+class ArrayUnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+        self.rank = [0] * size
     
-    node_ids = [node['id'] for node in nodes]
+    def find(self, node):
+        parent = self.parent
+        while parent[node] != node:
+            # Path halving keeps trees shallow without recursion.
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+    
+    def union(self, node1, node2):
+        root1 = self.find(node1)
+        root2 = self.find(node2)
+        
+        if root1 == root2:
+            return False
+        
+        if self.rank[root1] < self.rank[root2]:
+            root1, root2 = root2, root1
+        self.parent[root2] = root1
+        if self.rank[root1] == self.rank[root2]:
+            self.rank[root1] += 1
+        
+        return True
     
-    sorted_edges = sorted(edges, key=lambda e: e[2])
+    def connected(self, node1, node2):
+        return self.find(node1) == self.find(node2)
+
+def findMSTEdgeIds(index):
+    edgeU = scalarView(index.edgeU)
+    edgeV = scalarView(index.edgeV)
     
-    uf = UnionFind(node_ids)
-    mstEdges = []
-    totalCost = 0
+    uf = ArrayUnionFind(index.numNodes)
+    treeEdgeIds = []
+    edgesScanned = 0
     
-    for u, v, weight in sorted_edges:
-        if uf.union(u, v):
-            mstEdges.append((u, v, weight))
-            totalCost += weight
+    for edgeId in scalarView(index.sortedEdgeIds):
+        edgesScanned += 1
+        if uf.union(edgeU[edgeId], edgeV[edgeId]):
+            treeEdgeIds.append(edgeId)
             
-            if len(mstEdges) == len(node_ids) - 1:
+            if len(treeEdgeIds) == index.numNodes - 1:
                 break
     
-    edgeList = [f"({u} - {v}) Cost: {weight}" for u, v, weight in mstEdges]
+    recordSolverStats('kruskal', edgesScanned=edgesScanned, treeEdges=len(treeEdgeIds))
+    return treeEdgeIds
+
+def formatMSTEdges(mstEdges):
+    return [f"({u} - {v}) Cost: {weight}" for u, v, weight in mstEdges]
+
+def buildMST(graph):
+    index = asGraphIndex(graph)
+    
+    mstEdges = [index.edgeTuple(edgeId) for edgeId in findMSTEdgeIds(index)]
+    totalCost = sum(weight for _, _, weight in mstEdges)
     
     return {
         'cost': totalCost,
-        'edges': edgeList
-    }
\ No newline at end of file
+        'edges': formatMSTEdges(mstEdges)
+    }
+
+class DynamicMST:
+    # copy() is cheap so every request can edit its own tree: clones share
+    # the base edge list, the endpoint index and every adjacency dict, and
+    # copy a node's dict or the non-tree list only when they first change
+    # it. Added and removed edges live in small per-tree overlays.
+    def __init__(self, graph, treeEdgeIds=None):
+        self.index = asGraphIndex(graph)
+        index = self.index
+        if treeEdgeIds is None:
+            treeEdgeIds = findMSTEdgeIds(index)
+        
+        self.baseEdges = list(zip(index.edgeU.tolist(), index.edgeV.tolist(), index.weightList(index.edgeWeights)))
+        self.baseEndpoints = {}
+        for edgeId, (u, v, _) in enumerate(self.baseEdges):
+            self.baseEndpoints.setdefault((u, v) if u <= v else (v, u), []).append(edgeId)
+        self.addedEdges = {}
+        self.addedEndpoints = {}
+        self.removedEdges = set()
+        self.nextEdgeId = index.numEdges
+        
+        self.treeAdjacency = [dict() for _ in range(index.numNodes)]
+        self.ownedNodes = None
+        self.cost = 0
+        for edgeId in treeEdgeIds:
+            self._linkTreeEdge(edgeId)
+        
+        # Non-tree edges stay ordered by (weight, id); the base order comes
+        # straight from the index, so no sort is needed here.
+        treeSet = set(treeEdgeIds)
+        self.nonTreeEdges = [(self.baseEdges[edgeId][2], edgeId) for edgeId in index.sortedEdgeIds.tolist() if edgeId not in treeSet]
+        self.ownsNonTreeEdges = True
+    
+    def copy(self):
+        # Both trees now share state, so neither may write to it in place.
+        self.ownedNodes = set()
+        self.ownsNonTreeEdges = False
+        
+        clone = DynamicMST.__new__(DynamicMST)
+        clone.index = self.index
+        clone.baseEdges = self.baseEdges
+        clone.baseEndpoints = self.baseEndpoints
+        clone.addedEdges = dict(self.addedEdges)
+        clone.addedEndpoints = {key: list(edgeIds) for key, edgeIds in self.addedEndpoints.items()}
+        clone.removedEdges = set(self.removedEdges)
+        clone.nextEdgeId = self.nextEdgeId
+        clone.treeAdjacency = self.treeAdjacency
+        clone.ownedNodes = set()
+        clone.cost = self.cost
+        clone.nonTreeEdges = self.nonTreeEdges
+        clone.ownsNonTreeEdges = False
+        return clone
+    
+    def _edge(self, edgeId):
+        if edgeId < len(self.baseEdges):
+            return self.baseEdges[edgeId]
+        return self.addedEdges[edgeId]
+    
+    def _writableNeighbors(self, node):
+        if self.ownedNodes is not None and node not in self.ownedNodes:
+            if not self.ownedNodes:
+                self.treeAdjacency = list(self.treeAdjacency)
+            self.treeAdjacency[node] = dict(self.treeAdjacency[node])
+            self.ownedNodes.add(node)
+        return self.treeAdjacency[node]
+    
+    def _writableNonTreeEdges(self):
+        if not self.ownsNonTreeEdges:
+            self.nonTreeEdges = list(self.nonTreeEdges)
+            self.ownsNonTreeEdges = True
+        return self.nonTreeEdges
+    
+    def _linkTreeEdge(self, edgeId):
+        u, v, weight = self._edge(edgeId)
+        self._writableNeighbors(u)[v] = edgeId
+        self._writableNeighbors(v)[u] = edgeId
+        self.cost += weight
+    
+    def _unlinkTreeEdge(self, edgeId):
+        u, v, weight = self._edge(edgeId)
+        del self._writableNeighbors(u)[v]
+        del self._writableNeighbors(v)[u]
+        self.cost -= weight
+    
+    def _isTreeEdge(self, edgeId):
+        u, v, _ = self._edge(edgeId)
+        return self.treeAdjacency[u].get(v) == edgeId
+    
+    def _treePath(self, source, target):
+        parentEdge = {source: None}
+        stack = [source]
+        while stack:
+            node = stack.pop()
+            if node == target:
+                break
+            for neighbor, edgeId in self.treeAdjacency[node].items():
+                if neighbor not in parentEdge:
+                    parentEdge[neighbor] = (node, edgeId)
+                    stack.append(neighbor)
+        
+        if target not in parentEdge:
+            return None
+        
+        path = []
+        node = target
+        while parentEdge[node] is not None:
+            node, edgeId = parentEdge[node]
+            path.append(edgeId)
+        return path
+    
+    def _describe(self, edgeId):
+        u, v, weight = self._edge(edgeId)
+        return (self.index.nodeIds[u], self.index.nodeIds[v], weight)
+    
+    def _nodeIndex(self, nodeId):
+        if nodeId not in self.index.nodeIndex:
+            raise ValueError(f"Invalid Node ({nodeId})")
+        return self.index.nodeIndex[nodeId]
+    
+    def addEdge(self, startNode, endNode, weight):
+        u = self._nodeIndex(startNode)
+        v = self._nodeIndex(endNode)
+        edgeId = self.nextEdgeId
+        self.nextEdgeId += 1
+        self.addedEdges[edgeId] = (u, v, weight)
+        self.addedEndpoints.setdefault((u, v) if u <= v else (v, u), []).append(edgeId)
+        costBefore = self.cost
+        added, removed = [], []
+        
+        path = self._treePath(u, v) if u != v else []
+        if path is None:
+            self._linkTreeEdge(edgeId)
+            added.append(edgeId)
+        else:
+            # Cycle property: the new edge enters the tree only if it is
+            # lighter than the heaviest edge on the cycle it closes.
+            heaviest = max(path, key=lambda pathEdge: (self._edge(pathEdge)[2], pathEdge)) if path else None
+            if heaviest is not None and weight < self._edge(heaviest)[2]:
+                self._unlinkTreeEdge(heaviest)
+                bisect.insort(self._writableNonTreeEdges(), (self._edge(heaviest)[2], heaviest))
+                self._linkTreeEdge(edgeId)
+                added.append(edgeId)
+                removed.append(heaviest)
+            else:
+                bisect.insort(self._writableNonTreeEdges(), (weight, edgeId))
+        
+        return self._buildDiff(edgeId, added, removed, costBefore)
+    
+    def findEdgeId(self, startNode, endNode):
+        u = self._nodeIndex(startNode)
+        v = self._nodeIndex(endNode)
+        treeEdgeId = self.treeAdjacency[u].get(v)
+        if treeEdgeId is not None:
+            return treeEdgeId
+        key = (u, v) if u <= v else (v, u)
+        matches = [edgeId for edgeId in self.baseEndpoints.get(key, ()) if edgeId not in self.removedEdges]
+        matches += self.addedEndpoints.get(key, ())
+        if not matches:
+            raise ValueError(f"No road between {startNode} and {endNode}")
+        return min(matches, key=lambda edgeId: (self._edge(edgeId)[2], edgeId))
+    
+    def removeEdge(self, startNode, endNode):
+        return self.removeEdgeById(self.findEdgeId(startNode, endNode))
+    
+    def removeEdgeById(self, edgeId):
+        if edgeId in self.removedEdges:
+            raise KeyError(edgeId)
+        costBefore = self.cost
+        added, removed = [], []
+        
+        if not self._isTreeEdge(edgeId):
+            weight = self._edge(edgeId)[2]
+            nonTreeEdges = self._writableNonTreeEdges()
+            position = bisect.bisect_left(nonTreeEdges, (weight, edgeId))
+            del nonTreeEdges[position]
+        else:
+            u, v, _ = self._edge(edgeId)
+            self._unlinkTreeEdge(edgeId)
+            removed.append(edgeId)
+            
+            side = {u}
+            stack = [u]
+            while stack:
+                node = stack.pop()
+                for neighbor in self.treeAdjacency[node]:
+                    if neighbor not in side:
+                        side.add(neighbor)
+                        stack.append(neighbor)
+            
+            # The lightest non-tree edge crossing the cut reconnects the tree.
+            for position, (weight, candidate) in enumerate(self.nonTreeEdges):
+                a, b, _ = self._edge(candidate)
+                if (a in side) != (b in side):
+                    del self._writableNonTreeEdges()[position]
+                    self._linkTreeEdge(candidate)
+                    added.append(candidate)
+                    break
+        
+        diff = self._buildDiff(edgeId, added, removed, costBefore)
+        if edgeId in self.addedEdges:
+            u, v, _ = self.addedEdges.pop(edgeId)
+            self.addedEndpoints[(u, v) if u <= v else (v, u)].remove(edgeId)
+        else:
+            self.removedEdges.add(edgeId)
+        return diff
+    
+    def _buildDiff(self, edgeId, added, removed, costBefore):
+        return {
+            'edge': self._describe(edgeId),
+            'addedToTree': formatMSTEdges([self._describe(treeEdge) for treeEdge in added]),
+            'removedFromTree': formatMSTEdges([self._describe(treeEdge) for treeEdge in removed]),
+            'cost': self.cost,
+            'costDelta': self.cost - costBefore
+        }
+    
+    def treeEdgeIds(self):
+        return sorted({edgeId for neighbors in self.treeAdjacency for edgeId in neighbors.values()}, key=lambda edgeId: (self._edge(edgeId)[2], edgeId))
+    
+    def result(self):
+        return {
+            'cost': self.cost,
+            'edges': formatMSTEdges([self._describe(edgeId) for edgeId in self.treeEdgeIds()])
+        }
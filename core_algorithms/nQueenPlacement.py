@@ -1,3 +1,9 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from core_algorithms.instrumentation import recordSolverStats
+
 def generateGrid(n, placement):
     grid = []
     
@@ -14,6 +20,7 @@ def generateGrid(n, placement):
 def solveNQueens(n):
     board = [-1] * n
     solutions = []
+    nodesVisited = 0
 
     def isSafe(row, col):
         for prevRow in range(row):
@@ -24,6 +31,8 @@ def solveNQueens(n):
         return True
 
     def solve(row):
+        nonlocal nodesVisited
+        nodesVisited += 1
         if row == n:
             solution = [(r, board[r]) for r in range(n)]
             solutions.append(solution)
@@ -36,22 +45,114 @@ def solveNQueens(n):
                 board[row] = -1
 
     solve(0)
+    recordSolverStats('nQueensEnumerate', nodesVisited=nodesVisited, solutions=len(solutions))
     return solutions
 
-def findSensorPlacement(n):
-    solutions = solveNQueens(n)
+def constructQueenPlacement(n):
+    if n == 1:
+        return [(0, 0)]
+    if n < 4:
+        return None
+
+    # Explicit construction (Hoffman, Loessi and Moore): evens then odds,
+    # with the two residues mod 6 that would clash patched up.
+    evens = list(range(2, n + 1, 2))
+    odds = list(range(1, n + 1, 2))
+    if n % 6 == 2:
+        odds = [3, 1] + odds[3:] + [5]
+    elif n % 6 == 3:
+        evens = evens[1:] + [2]
+        odds = odds[2:] + [1, 3]
+
+    return [(row, col - 1) for row, col in enumerate(evens + odds)]
+
+def countCompletions(n, cols, leftDiagonals, rightDiagonals, visited):
+    visited[0] += 1
+    full = (1 << n) - 1
+    if cols == full:
+        return 1
+
+    count = 0
+    available = full & ~(cols | leftDiagonals | rightDiagonals)
+    while available:
+        bit = available & -available
+        available ^= bit
+        count += countCompletions(n, cols | bit, ((leftDiagonals | bit) << 1) & full, (rightDiagonals | bit) >> 1, visited)
+    return count
+
+def exploreFromFirstColumn(n, col):
+    # Returns the solution count and the number of backtracking nodes visited.
+    bit = 1 << col
+    visited = [0]
+    count = countCompletions(n, bit, (bit << 1) & ((1 << n) - 1), bit >> 1, visited)
+    return count, visited[0]
+
+def countFromFirstColumn(n, col):
+    return exploreFromFirstColumn(n, col)[0]
+
+PARALLEL_COUNT_THRESHOLD = 11
+
+# One pool per process, created on first use and shared by every count, so
+# web requests never start a process pool of their own.
+_countPool = None
+_countPoolLock = threading.Lock()
+
+def getCountPool():
+    global _countPool
+    if _countPool is None:
+        with _countPoolLock:
+            if _countPool is None:
+                _countPool = ProcessPoolExecutor()
+    return _countPool
+
+def resetCountPool(pool):
+    global _countPool
+    with _countPoolLock:
+        if _countPool is pool:
+            _countPool = None
+    pool.shutdown(wait=False)
+
+def countNQueens(n, workers=None):
+    # workers=1 counts in this process; anything else uses the shared pool.
+    if n < 1:
+        return 0
+
+    # Mirror symmetry: a first-row queen in column c and in n-1-c give the
+    # same number of solutions, so only the left half (plus the middle
+    # column for odd n) is searched.
+    halfColumns = list(range(n // 2))
+    middleColumn = [n // 2] if n % 2 else []
+
+    results = None
+    if n >= PARALLEL_COUNT_THRESHOLD and workers != 1:
+        pool = getCountPool()
+        try:
+            results = list(pool.map(exploreFromFirstColumn, [n] * len(halfColumns + middleColumn), halfColumns + middleColumn))
+        except BrokenProcessPool:
+            # A worker died; the next count starts a fresh pool.
+            resetCountPool(pool)
+    if results is None:
+        results = [exploreFromFirstColumn(n, col) for col in halfColumns + middleColumn]
+    halfResults, middleResults = results[:len(halfColumns)], results[len(halfColumns):]
+
+    halfCount = sum(count for count, _ in halfResults)
+    middleCount = sum(count for count, _ in middleResults)
+    recordSolverStats('nQueensCount', nodesVisited=sum(visited for _, visited in halfResults + middleResults))
+    return 2 * halfCount + middleCount
+
+def findSensorPlacement(n, countSolutions=True, workers=None):
+    placement = constructQueenPlacement(n)
     
-    if solutions:
-        firstPlacement = solutions[0]
-        coords = [f"({r}, {c})" for r, c in firstPlacement]
+    if placement:
+        coords = [f"({r}, {c})" for r, c in placement]
         
-        visualGrid = generateGrid(n, firstPlacement) 
+        visualGrid = generateGrid(n, placement) 
         
         return {
             'n': n,
             'success': True,
             'coordinates': coords,
-            'count': len(solutions),
+            'count': countNQueens(n, workers) if countSolutions else None,
             'visualGrid': visualGrid
         }
     else:
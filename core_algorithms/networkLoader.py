@@ -0,0 +1,295 @@
+import argparse
+import json
+import re
+from array import array
+
+import numpy as np
+
+from core_algorithms.graphIndex import GraphIndex
+from core_algorithms.travelTimeProfiles import DEFAULT_PERIOD, TravelTimeProfiles, buildTravelTimeProfiles
+
+CHUNK_SIZE = 1 << 20
+ARCHIVE_FORMAT_VERSION = 1
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r'\s*')
+
+
+class ChunkedJsonReader:
+    # Walks a JSON document a chunk at a time. Only one array element is ever
+    # decoded into Python objects, so memory stays flat however many edges
+    # the file holds.
+
+    def __init__(self, f, chunkSize=CHUNK_SIZE):
+        self.f = f
+        self.chunkSize = chunkSize
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunkSize)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = _whitespace.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos} of the network file.")
+        self.pos += 1
+
+    def decodeValue(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                # A number that runs up to the end of the buffer may continue
+                # in the next chunk.
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def iterArray(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.decodeValue()
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect(']')
+            return
+
+    def iterObject(self):
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.decodeValue()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect('}')
+            return
+
+
+class NetworkArrayBuilder:
+    def __init__(self):
+        self.nodeIds = []
+        self.nodeNames = []
+        self.nodeIndex = {}
+        self.edgeU = array('i')
+        self.edgeV = array('i')
+        self.edgeWeights = array('d')
+        self.integerWeights = True
+        self.intTypedWeights = False
+        self.profilePeriod = DEFAULT_PERIOD
+        self.profileShapes = {}
+        self.profileNames = {}
+        self.profileU = array('i')
+        self.profileV = array('i')
+        self.profileShape = array('i')
+        self.unresolvedProfiles = {}
+
+    def internNode(self, nodeId, name=None):
+        index = self.nodeIndex.get(nodeId)
+        if index is None:
+            index = len(self.nodeIds)
+            self.nodeIndex[nodeId] = index
+            self.nodeIds.append(nodeId)
+            self.nodeNames.append(name if name is not None else nodeId)
+        elif name is not None:
+            self.nodeNames[index] = name
+        return index
+
+    def addNode(self, node):
+        self.internNode(node['id'], node.get('name'))
+
+    def addEdge(self, u, v, weight):
+        self.edgeU.append(self.internNode(u))
+        self.edgeV.append(self.internNode(v))
+        self.edgeWeights.append(weight)
+        if type(weight) is int:
+            self.intTypedWeights = True
+        elif self.integerWeights and not float(weight).is_integer():
+            self.integerWeights = False
+
+    def addEdgeProfile(self, u, v, name):
+        # Roads are matched to profiles once every edge is known, since the
+        # profiles object may come before the edge list in the file. Nodes
+        # not seen yet are looked up then as well; a profile entry never
+        # creates a node.
+        if name not in self.profileNames:
+            self.profileNames[name] = len(self.profileNames)
+        uIndex = self.nodeIndex.get(u, -1)
+        vIndex = self.nodeIndex.get(v, -1)
+        if uIndex < 0 or vIndex < 0:
+            self.unresolvedProfiles[len(self.profileShape)] = (u, v)
+        self.profileU.append(uIndex)
+        self.profileV.append(vIndex)
+        self.profileShape.append(self.profileNames[name])
+
+    def build(self, version=None):
+        edgeWeights = np.frombuffer(self.edgeWeights, dtype=np.float64)
+        if self.integerWeights:
+            edgeWeights = edgeWeights.astype(np.int64)
+        index = GraphIndex(
+            self.nodeIds,
+            self.nodeNames,
+            np.frombuffer(self.edgeU, dtype=np.int32).copy(),
+            np.frombuffer(self.edgeV, dtype=np.int32).copy(),
+            edgeWeights.copy(),
+            version,
+            mixedWeights=self.intTypedWeights and not self.integerWeights,
+        )
+        if self.profileShapes or self.profileShape:
+            names = list(self.profileNames)
+            for position, (u, v) in self.unresolvedProfiles.items():
+                if u not in self.nodeIndex or v not in self.nodeIndex:
+                    raise ValueError(f"Travel-time profile '{names[self.profileShape[position]]}' names an unknown node ({u} or {v}).")
+                self.profileU[position] = self.nodeIndex[u]
+                self.profileV[position] = self.nodeIndex[v]
+            assignments = ((u, v, names[shape]) for u, v, shape in zip(self.profileU, self.profileV, self.profileShape))
+            index.profiles = buildTravelTimeProfiles(index, self.profileShapes, assignments, self.profilePeriod)
+        return index
+
+
+def readProfiles(reader, builder):
+    for key in reader.iterObject():
+        if key == 'edges':
+            for u, v, name in reader.iterArray():
+                builder.addEdgeProfile(u, v, name)
+        elif key == 'shapes':
+            builder.profileShapes = reader.decodeValue()
+        elif key == 'period':
+            builder.profilePeriod = reader.decodeValue()
+        else:
+            reader.decodeValue()
+
+
+def streamJsonNetwork(path, chunkSize=CHUNK_SIZE):
+    builder = NetworkArrayBuilder()
+    with open(path, encoding='utf-8') as f:
+        reader = ChunkedJsonReader(f, chunkSize)
+        for key in reader.iterObject():
+            if key == 'nodes':
+                for node in reader.iterArray():
+                    builder.addNode(node)
+            elif key == 'edges':
+                for u, v, weight in reader.iterArray():
+                    builder.addEdge(u, v, weight)
+            elif key == 'profiles':
+                readProfiles(reader, builder)
+            else:
+                reader.decodeValue()
+    return builder.build()
+
+
+def streamNdjsonNetwork(path):
+    # One record per line: {"id": ..., "name": ...} for a node, or
+    # ["U", "V", cost] / U,V,cost for an edge.
+    builder = NetworkArrayBuilder()
+    with open(path, encoding='utf-8') as f:
+        for lineNumber, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line[0] == '{':
+                builder.addNode(json.loads(line))
+            elif line[0] == '[':
+                u, v, weight = json.loads(line)
+                builder.addEdge(u, v, weight)
+            else:
+                parts = line.split(',')
+                if len(parts) != 3:
+                    raise ValueError(f"Line {lineNumber}: expected U,V,cost")
+                builder.addEdge(parts[0].strip(), parts[1].strip(), json.loads(parts[2]))
+    return builder.build()
+
+
+def saveGraphArchive(index, path):
+    profileArrays = {}
+    if index.profiles is not None:
+        profileArrays = dict(index.profiles.arrays(), profilePeriod=np.array(index.profiles.period), profileNames=np.array(index.profiles.names, dtype=str))
+    np.savez(
+        path,
+        formatVersion=np.array(ARCHIVE_FORMAT_VERSION),
+        nodeIds=np.array(index.nodeIds, dtype=str),
+        nodeNames=np.array(index.nodeNames, dtype=str),
+        edgeU=index.edgeU,
+        edgeV=index.edgeV,
+        edgeWeights=index.edgeWeights,
+        offsets=index.offsets,
+        targets=index.targets,
+        slotEdges=index.slotEdges,
+        sortedEdgeIds=index.sortedEdgeIds,
+        mixedWeights=np.array(index.mixedWeights),
+        **profileArrays,
+    )
+
+
+def openGraphArchive(path, version=None):
+    with np.load(path) as data:
+        if int(data['formatVersion']) != ARCHIVE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported graph archive version in {path}")
+        csr = {key: data[key] for key in ('offsets', 'targets', 'slotEdges', 'sortedEdgeIds')}
+        profiles = None
+        if 'edgeProfile' in data.files:
+            profiles = TravelTimeProfiles.fromArrays(float(data['profilePeriod']), data['profileNames'].tolist(), data)
+        return GraphIndex(
+            data['nodeIds'].tolist(),
+            data['nodeNames'].tolist(),
+            data['edgeU'],
+            data['edgeV'],
+            data['edgeWeights'],
+            version,
+            csr=csr,
+            profiles=profiles,
+            mixedWeights='mixedWeights' in data.files and bool(data['mixedWeights']),
+        )
+
+
+def loadNetworkFile(path, chunkSize=CHUNK_SIZE):
+    if path.endswith('.npz'):
+        return openGraphArchive(path)
+    if path.endswith('.ndjson') or path.endswith('.csv'):
+        return streamNdjsonNetwork(path)
+    return streamJsonNetwork(path, chunkSize)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a city network into a binary graph archive.")
+    parser.add_argument('source', help="city_network.json, or a .ndjson/.csv edge file")
+    parser.add_argument('output', help="destination .npz archive")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    index = loadNetworkFile(args.source, args.chunk_size)
+    saveGraphArchive(index, args.output)
+    print(f"Wrote {index.numNodes} nodes and {index.numEdges} edges to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_DIR_ENV = 'URBAN_PLANNER_CACHE_DIR'
+CACHE_FILE = 'results.sqlite3'
+
+
+class ResultCache:
+    def __init__(self, maxEntries=512, cacheDir=None):
+        self.maxEntries = maxEntries
+        self.cachePath = os.path.join(cacheDir, CACHE_FILE) if cacheDir else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.diskHits = 0
+        self.misses = 0
+
+        if self.cachePath:
+            os.makedirs(cacheDir, exist_ok=True)
+            self._execute('PRAGMA journal_mode=WAL')
+            self._execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, datasetHash TEXT NOT NULL, value BLOB NOT NULL, createdAt REAL NOT NULL)'
+            )
+
+    def _execute(self, statement, params=(), fetchOne=False):
+        # A short-lived connection per call keeps the tier safe to use from
+        # any thread and from several worker processes at once.
+        connection = sqlite3.connect(self.cachePath, timeout=5)
+        try:
+            with connection:
+                cursor = connection.execute(statement, params)
+                return cursor.fetchone() if fetchOne else None
+        finally:
+            connection.close()
+
+    @staticmethod
+    def makeKey(solverName, datasetHash, params):
+        return hashlib.sha1(repr((solverName, datasetHash, tuple(params))).encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key][1]
+
+        if self.cachePath:
+            row = self._execute('SELECT datasetHash, value FROM results WHERE key = ?', (key,), fetchOne=True)
+            if row is not None:
+                value = pickle.loads(row[1])
+                self._remember(key, row[0], value)
+                with self._lock:
+                    self.diskHits += 1
+                return True, value
+
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def _remember(self, key, datasetHash, value):
+        with self._lock:
+            self._entries[key] = (datasetHash, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+
+    def put(self, key, datasetHash, value):
+        self._remember(key, datasetHash, value)
+        if self.cachePath:
+            self._execute(
+                'INSERT OR REPLACE INTO results (key, datasetHash, value, createdAt) VALUES (?, ?, ?, ?)',
+                (key, datasetHash, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time()),
+            )
+
+    def getOrCompute(self, solverName, datasetHash, params, compute):
+        key = self.makeKey(solverName, datasetHash, params)
+        found, value = self.get(key)
+        if not found:
+            value = compute()
+            self.put(key, datasetHash, value)
+        return value
+
+    def invalidate(self, currentDatasetHash=None):
+        # Results that do not depend on a dataset are stored under an empty
+        # hash and survive a data change.
+        keep = {'', currentDatasetHash}
+        with self._lock:
+            for key in [key for key, (datasetHash, _) in self._entries.items() if datasetHash not in keep]:
+                del self._entries[key]
+
+        if self.cachePath:
+            if currentDatasetHash is None:
+                self._execute("DELETE FROM results WHERE datasetHash != ''")
+            else:
+                self._execute("DELETE FROM results WHERE datasetHash NOT IN ('', ?)", (currentDatasetHash,))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.cachePath:
+            self._execute('DELETE FROM results')
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'diskHits': self.diskHits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'maxEntries': self.maxEntries,
+                'diskPath': self.cachePath,
+            }
+
+
+_defaultCache = None
+_defaultCacheLock = threading.Lock()
+
+
+def getResultCache():
+    global _defaultCache
+    if _defaultCache is None:
+        with _defaultCacheLock:
+            if _defaultCache is None:
+                _defaultCache = ResultCache(cacheDir=os.environ.get(CACHE_DIR_ENV))
+    return _defaultCache
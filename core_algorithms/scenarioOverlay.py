@@ -0,0 +1,289 @@
+import heapq
+
+from core_algorithms.graphIndex import asGraphIndex
+from core_algorithms.instrumentation import recordSolverStats
+from core_algorithms.mstBuilder import DynamicMST, formatMSTEdges
+from core_algorithms.shortestPath import formatPathResult, getShortestPathTree, runDijkstra, treeCache
+
+SPEC_KEYS = ('name', 'closeRoads', 'closeNodes', 'setCost', 'adjustCost', 'scaleCost', 'addRoads')
+
+
+def checkRoadCost(cost):
+    # Dijkstra is only correct for non-negative weights; NaN compares false
+    # against everything and would slip through a plain "< 0" check.
+    if not 0 <= cost < float('inf'):
+        raise ValueError(f"Road costs must be finite and non-negative, got {cost}.")
+    return cost
+
+
+class Scenario:
+    # A scenario never touches the base index. It records only its edits:
+    # overridden weights and closures keyed by base edge id, plus any new
+    # roads, so thousands of scenarios can share one base graph.
+
+    def __init__(self, index, name=None):
+        self.index = asGraphIndex(index)
+        self.name = name
+        self.weights = {}
+        self.closedEdges = set()
+        self.closedNodes = set()
+        self.addedEdges = []
+        self._addedAdjacency = None
+
+    @property
+    def isEmpty(self):
+        return not (self.weights or self.closedEdges or self.closedNodes or self.addedEdges)
+
+    def _nodeIndex(self, nodeId):
+        if nodeId not in self.index.nodeIndex:
+            raise ValueError(f"Invalid Node ({nodeId})")
+        return self.index.nodeIndex[nodeId]
+
+    def findEdgeIds(self, startNode, endNode):
+        u = self._nodeIndex(startNode)
+        v = self._nodeIndex(endNode)
+        offsets, targets, _, slotEdges = self.index.csrLists()
+        edgeIds = [slotEdges[slot] for slot in range(offsets[u], offsets[u + 1]) if targets[slot] == v]
+        if not edgeIds:
+            raise ValueError(f"No road between {startNode} and {endNode}")
+        return sorted(set(edgeIds))
+
+    def currentWeight(self, edgeId):
+        if edgeId in self.weights:
+            return self.weights[edgeId]
+        return self.index.edgeWeight(edgeId)
+
+    def setCost(self, startNode, endNode, cost):
+        for edgeId in self.findEdgeIds(startNode, endNode):
+            self.weights[edgeId] = checkRoadCost(cost)
+        return self
+
+    def adjustCost(self, startNode, endNode, delta):
+        for edgeId in self.findEdgeIds(startNode, endNode):
+            self.weights[edgeId] = checkRoadCost(self.currentWeight(edgeId) + delta)
+        return self
+
+    def scaleCost(self, startNode, endNode, factor):
+        for edgeId in self.findEdgeIds(startNode, endNode):
+            self.weights[edgeId] = checkRoadCost(self.currentWeight(edgeId) * factor)
+        return self
+
+    def closeRoad(self, startNode, endNode):
+        self.closedEdges.update(self.findEdgeIds(startNode, endNode))
+        return self
+
+    def closeNode(self, nodeId):
+        self.closedNodes.add(self._nodeIndex(nodeId))
+        return self
+
+    def addRoad(self, startNode, endNode, cost):
+        self.addedEdges.append((self._nodeIndex(startNode), self._nodeIndex(endNode), checkRoadCost(cost)))
+        self._addedAdjacency = None
+        return self
+
+    def isEdgeOpen(self, edgeId):
+        return (
+            edgeId not in self.closedEdges
+            and int(self.index.edgeU[edgeId]) not in self.closedNodes
+            and int(self.index.edgeV[edgeId]) not in self.closedNodes
+        )
+
+    def addedAdjacency(self):
+        if self._addedAdjacency is None:
+            adjacency = {}
+            for u, v, cost in self.addedEdges:
+                if u in self.closedNodes or v in self.closedNodes:
+                    continue
+                adjacency.setdefault(u, []).append((v, cost))
+                adjacency.setdefault(v, []).append((u, cost))
+            self._addedAdjacency = adjacency
+        return self._addedAdjacency
+
+    @classmethod
+    def fromSpec(cls, index, spec):
+        if not isinstance(spec, dict):
+            raise ValueError("Each scenario must be a JSON object.")
+        unknownKeys = sorted(str(key) for key in spec if key not in SPEC_KEYS)
+        if unknownKeys:
+            raise ValueError(f"Unknown scenario keys: {', '.join(unknownKeys)}. Expected any of: {', '.join(SPEC_KEYS)}.")
+        scenario = cls(index, spec.get('name'))
+
+        def edits(key, size):
+            entries = spec.get(key, [])
+            if not isinstance(entries, list) or any(not isinstance(entry, list) or len(entry) != size for entry in entries):
+                raise ValueError(f"Expected '{key}' as a list of {size}-item lists.")
+            return entries
+
+        def number(value):
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                raise ValueError("Costs, deltas and factors must be numbers.")
+            return value
+
+        for startNode, endNode in edits('closeRoads', 2):
+            scenario.closeRoad(str(startNode).upper(), str(endNode).upper())
+        closeNodes = spec.get('closeNodes', [])
+        if not isinstance(closeNodes, list):
+            raise ValueError("Expected 'closeNodes' as a list of node ids.")
+        for nodeId in closeNodes:
+            scenario.closeNode(str(nodeId).upper())
+        for startNode, endNode, cost in edits('setCost', 3):
+            scenario.setCost(str(startNode).upper(), str(endNode).upper(), number(cost))
+        for startNode, endNode, delta in edits('adjustCost', 3):
+            scenario.adjustCost(str(startNode).upper(), str(endNode).upper(), number(delta))
+        for startNode, endNode, factor in edits('scaleCost', 3):
+            scenario.scaleCost(str(startNode).upper(), str(endNode).upper(), number(factor))
+        for startNode, endNode, cost in edits('addRoads', 3):
+            scenario.addRoad(str(startNode).upper(), str(endNode).upper(), number(cost))
+        return scenario
+
+
+def runScenarioDijkstra(scenario, source, target=-1):
+    index = scenario.index
+    if scenario.isEmpty:
+        return runDijkstra(index, source, target)
+
+    offsets, targets, weights, slotEdges = index.csrLists()
+    overrides = scenario.weights
+    closedEdges = scenario.closedEdges
+    closedNodes = scenario.closedNodes
+    addedAdjacency = scenario.addedAdjacency()
+
+    distances = [float('inf')] * index.numNodes
+    predecessors = [-1] * index.numNodes
+    visited = [False] * index.numNodes
+
+    if source in closedNodes:
+        return distances, predecessors
+
+    distances[source] = 0
+    priorityQueue = [(0, source)]
+    heapPushes = 1
+    nodesSettled = 0
+
+    while priorityQueue:
+        currentDistance, currentNode = heapq.heappop(priorityQueue)
+
+        if visited[currentNode]:
+            continue
+
+        visited[currentNode] = True
+        nodesSettled += 1
+
+        if currentNode == target:
+            break
+
+        for slot in range(offsets[currentNode], offsets[currentNode + 1]):
+            neighbor = targets[slot]
+            edgeId = slotEdges[slot]
+            if edgeId in closedEdges or neighbor in closedNodes:
+                continue
+            distance = currentDistance + overrides.get(edgeId, weights[slot])
+
+            if distance < distances[neighbor]:
+                distances[neighbor] = distance
+                predecessors[neighbor] = currentNode
+                heapq.heappush(priorityQueue, (distance, neighbor))
+                heapPushes += 1
+
+        for neighbor, weight in addedAdjacency.get(currentNode, ()):
+            distance = currentDistance + weight
+
+            if distance < distances[neighbor]:
+                distances[neighbor] = distance
+                predecessors[neighbor] = currentNode
+                heapq.heappush(priorityQueue, (distance, neighbor))
+                heapPushes += 1
+
+    recordSolverStats('scenarioDijkstra', nodesSettled=nodesSettled, heapPushes=heapPushes)
+    return distances, predecessors
+
+
+def buildScenarioMST(scenario, baseTree=None):
+    # Replays the scenario's edits on a copy of the base tree instead of
+    # re-running Kruskal over the whole edge list.
+    tree = (baseTree or DynamicMST(scenario.index)).copy()
+    index = scenario.index
+
+    changedEdges = set(scenario.weights) | scenario.closedEdges
+    offsets, _, _, slotEdges = index.csrLists()
+    for node in scenario.closedNodes:
+        changedEdges.update(slotEdges[offsets[node]:offsets[node + 1]])
+
+    for edgeId in sorted(changedEdges):
+        tree.removeEdgeById(edgeId)
+        if scenario.isEdgeOpen(edgeId):
+            u, v, _ = index.edgeTuple(edgeId)
+            tree.addEdge(u, v, scenario.currentWeight(edgeId))
+
+    for u, v, cost in scenario.addedEdges:
+        if u not in scenario.closedNodes and v not in scenario.closedNodes:
+            tree.addEdge(index.nodeIds[u], index.nodeIds[v], cost)
+
+    return tree
+
+
+def diffRoute(scenario, startNode, endNode, cache=treeCache):
+    index = scenario.index
+    if startNode not in index.nodeIndex or endNode not in index.nodeIndex:
+        return {'start': startNode, 'end': endNode, 'error': f"Error: Invalid Node ({startNode} or {endNode})"}
+
+    source = index.nodeIndex[startNode]
+    target = index.nodeIndex[endNode]
+    baseDistances, basePredecessors = getShortestPathTree(index, source, cache)
+    baseline = formatPathResult(index, baseDistances, basePredecessors, target)
+    distances, predecessors = runScenarioDijkstra(scenario, source, target)
+    result = formatPathResult(index, distances, predecessors, target)
+
+    reachable = distances[target] != float('inf')
+    baseReachable = baseDistances[target] != float('inf')
+    return {
+        'start': startNode,
+        'end': endNode,
+        'basePath': baseline['path'],
+        'baseDistance': baseline['distance'] if baseReachable else None,
+        'path': result['path'],
+        'distance': result['distance'] if reachable else None,
+        'pathChanged': result['path'] != baseline['path'],
+        'deltaDistance': result['distance'] - baseline['distance'] if reachable and baseReachable else None,
+    }
+
+
+def diffMST(scenario, baseTree):
+    tree = buildScenarioMST(scenario, baseTree)
+    # The tree is a spanning forest of the nodes left open, with one edge
+    # fewer than nodes per component.
+    openNodes = scenario.index.numNodes - len(scenario.closedNodes)
+    baseEdges = baseTree.result()['edges']
+    scenarioEdges = tree.result()['edges']
+    baseSet = set(baseEdges)
+    scenarioSet = set(scenarioEdges)
+    return {
+        'baseCost': baseTree.cost,
+        'cost': tree.cost,
+        'costDelta': tree.cost - baseTree.cost,
+        'addedToTree': [edge for edge in scenarioEdges if edge not in baseSet],
+        'removedFromTree': [edge for edge in baseEdges if edge not in scenarioSet],
+        'spanning': openNodes - len(scenarioEdges) == 1,
+    }
+
+
+def evaluateScenario(scenario, routes=(), baseTree=None, includeMST=True):
+    result = {
+        'name': scenario.name,
+        'routes': [diffRoute(scenario, startNode, endNode) for startNode, endNode in routes],
+    }
+    if includeMST:
+        result['mst'] = diffMST(scenario, baseTree or DynamicMST(scenario.index))
+    return result
+
+
+def evaluateScenarios(scenarios, routes=(), baseTree=None, includeMST=True):
+    if not scenarios:
+        return []
+    if includeMST and baseTree is None:
+        baseTree = DynamicMST(scenarios[0].index)
+
+    # Evaluation is pure-Python CPU work, so threads would only take turns
+    # on the GIL. Every scenario shares the base index and tree and only
+    # allocates its own distance arrays and tree copy.
+    return [evaluateScenario(scenario, routes, baseTree, includeMST) for scenario in scenarios]
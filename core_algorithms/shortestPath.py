@@ -1,61 +1,165 @@
 import heapq
+import threading
+from collections import OrderedDict
+
+from core_algorithms.graphIndex import asGraphIndex
+from core_algorithms.instrumentation import recordSolverStats
+
+# A cached tree holds two Python lists of V entries, so the cache is bounded
+# by the total number of nodes across its trees rather than by tree count.
+DEFAULT_TREE_CACHE_NODES = 2_000_000
+
+class ShortestPathTreeCache:
+    def __init__(self, maxNodes=DEFAULT_TREE_CACHE_NODES):
+        self.maxNodes = maxNodes
+        self.cachedNodes = 0
+        self._trees = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            tree = self._trees.get(key)
+            if tree is None:
+                self.misses += 1
+                return None
+            self._trees.move_to_end(key)
+            self.hits += 1
+            return tree
+
+    def put(self, key, tree):
+        size = len(tree[0])
+        if size > self.maxNodes:
+            return
+        with self._lock:
+            previous = self._trees.pop(key, None)
+            if previous is not None:
+                self.cachedNodes -= len(previous[0])
+            self._trees[key] = tree
+            self.cachedNodes += size
+            while self.cachedNodes > self.maxNodes:
+                _, evicted = self._trees.popitem(last=False)
+                self.cachedNodes -= len(evicted[0])
+
+    def clear(self):
+        with self._lock:
+            self._trees.clear()
+            self.cachedNodes = 0
+
+treeCache = ShortestPathTreeCache()
+
+def runDijkstra(index, source, target=-1):
+    offsets, targets, weights, _ = index.csrLists()
+
+    distances = [float('inf')] * index.numNodes
+    predecessors = [-1] * index.numNodes
+
+    distances[source] = 0
+
+    priorityQueue = [(0, source)]
+    visited = [False] * index.numNodes
+    heapPushes = 1
+    nodesSettled = 0
 
-def solveDijkstra(graph, startNode, endNode):
-    nodes = graph['nodes']
-    edges = graph['edges']
-    
-    node_ids = [node['id'] for node in nodes]
-    
-    if startNode not in node_ids or endNode not in node_ids:
-        return {'path': f"Error: Invalid Node ({startNode} or {endNode})", 'distance': 0}
-    
-    adjacency = {}
-    for node in nodes:
-        adjacency[node['id']] = []
-    
-    for u, v, weight in edges:
-        adjacency[u].append((v, weight))
-        adjacency[v].append((u, weight))
-    
-    distances = {node: float('inf') for node in node_ids}
-    predecessors = {node: None for node in node_ids}
-    
-    distances[startNode] = 0
-    
-    priorityQueue = [(0, startNode)]
-    visited = set()
-    
     while priorityQueue:
         currentDistance, currentNode = heapq.heappop(priorityQueue)
-        
-        if currentNode in visited:
+
+        if visited[currentNode]:
             continue
-        
-        visited.add(currentNode)
-        
-        if currentNode == endNode:
+
+        visited[currentNode] = True
+        nodesSettled += 1
+
+        if currentNode == target:
             break
-        
-        for neighbor, weight in adjacency[currentNode]:
-            distance = currentDistance + weight
-            
+
+        for slot in range(offsets[currentNode], offsets[currentNode + 1]):
+            neighbor = targets[slot]
+            distance = currentDistance + weights[slot]
+
             if distance < distances[neighbor]:
                 distances[neighbor] = distance
                 predecessors[neighbor] = currentNode
                 heapq.heappush(priorityQueue, (distance, neighbor))
-    
-    if distances[endNode] == float('inf'):
+                heapPushes += 1
+
+    recordSolverStats('dijkstra', nodesSettled=nodesSettled, heapPushes=heapPushes)
+    return distances, predecessors
+
+def getShortestPathTree(index, source, cache=treeCache):
+    # Trees are only cached for indexes tied to a dataset version; an ad-hoc
+    # index built from a raw graph dict has no identity worth keying on.
+    if cache is None or index.version is None:
+        return runDijkstra(index, source)
+
+    key = (index.version, source)
+    tree = cache.get(key)
+    if tree is None:
+        tree = runDijkstra(index, source)
+        cache.put(key, tree)
+    return tree
+
+def formatPathResult(index, distances, predecessors, target):
+    if distances[target] == float('inf'):
         return {'path': "No path found.", 'distance': 0}
-    
+
     path = []
-    current = endNode
-    while current is not None:
-        path.append(current)
+    current = target
+    while current != -1:
+        path.append(index.nodeIds[current])
         current = predecessors[current]
-    
+
     path.reverse()
-    
+
     return {
-        'path': " -> ".join(path), 
-        'distance': distances[endNode]
-    }
\ No newline at end of file
+        'path': " -> ".join(path),
+        'distance': distances[target]
+    }
+
+def solveDijkstra(graph, startNode, endNode):
+    index = asGraphIndex(graph)
+
+    if startNode not in index.nodeIndex or endNode not in index.nodeIndex:
+        return {'path': f"Error: Invalid Node ({startNode} or {endNode})", 'distance': 0}
+
+    source = index.nodeIndex[startNode]
+    target = index.nodeIndex[endNode]
+    distances, predecessors = runDijkstra(index, source, target)
+    return formatPathResult(index, distances, predecessors, target)
+
+def solveDijkstraBatch(graph, pairs, cache=treeCache):
+    index = asGraphIndex(graph)
+
+    results = [None] * len(pairs)
+    pairsBySource = {}
+    for position, (startNode, endNode) in enumerate(pairs):
+        if startNode not in index.nodeIndex or endNode not in index.nodeIndex:
+            results[position] = {'start': startNode, 'end': endNode, 'path': f"Error: Invalid Node ({startNode} or {endNode})", 'distance': 0}
+            continue
+        pairsBySource.setdefault(index.nodeIndex[startNode], []).append((position, startNode, endNode))
+
+    for source, queries in pairsBySource.items():
+        distances, predecessors = getShortestPathTree(index, source, cache)
+        for position, startNode, endNode in queries:
+            result = formatPathResult(index, distances, predecessors, index.nodeIndex[endNode])
+            result['start'] = startNode
+            result['end'] = endNode
+            results[position] = result
+
+    return results
+
+def solveDistanceMatrix(graph, nodeList, cache=treeCache):
+    index = asGraphIndex(graph)
+
+    invalidNodes = [node for node in nodeList if node not in index.nodeIndex]
+    if invalidNodes:
+        return {'nodes': nodeList, 'distances': [], 'error': f"Error: Invalid Node ({', '.join(invalidNodes)})"}
+
+    columns = [index.nodeIndex[node] for node in nodeList]
+    matrix = []
+    for node in nodeList:
+        distances, _ = getShortestPathTree(index, index.nodeIndex[node], cache)
+        matrix.append([None if distances[column] == float('inf') else distances[column] for column in columns])
+
+    return {'nodes': nodeList, 'distances': matrix, 'error': None}
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+class SpatialIndex:
+    def __init__(self, coords):
+        # scipy.spatial costs more to import than the rest of the app
+        # together, so it waits until a spatial query needs a tree.
+        from scipy.spatial import cKDTree
+
+        self.points = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.tree = cKDTree(self.points)
+
+    def __len__(self):
+        return len(self.points)
+
+    def pairDistances(self, first, second):
+        delta = self.points[first] - self.points[second]
+        return np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+
+    def closestPair(self):
+        return self.closestPairWithComparisons()[0]
+
+    def closestPairWithComparisons(self):
+        if len(self.points) < 2:
+            return None, 0
+
+        distances, _ = self.tree.query(self.points, k=2)
+        shortest = distances[:, 1].min()
+
+        # Collect every pair at (or within rounding of) the shortest distance
+        # and break ties by index, matching the brute-force scan order.
+        pairs = self.tree.query_pairs(shortest * (1 + 1e-9), output_type='ndarray')
+        first = np.minimum(pairs[:, 0], pairs[:, 1])
+        second = np.maximum(pairs[:, 0], pairs[:, 1])
+        exact = self.pairDistances(first, second)
+        best = np.lexsort((second, first, exact))[0]
+        # One nearest-neighbour probe per point plus the exact tie checks.
+        comparisons = len(self.points) + len(pairs)
+        return (int(first[best]), int(second[best]), float(exact[best])), comparisons
+
+    def nearest(self, queries, k=1):
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        k = min(k, len(self.points))
+        if k == 0:
+            return np.empty((len(queries), 0)), np.empty((len(queries), 0), dtype=np.int64)
+        distances, indices = self.tree.query(queries, k=k)
+        return distances.reshape(len(queries), k), indices.reshape(len(queries), k)
+
+    def withinRadius(self, queries, radius):
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        return [sorted(matches) for matches in self.tree.query_ball_point(queries, radius)]
@@ -0,0 +1,243 @@
+import heapq
+import math
+
+from core_algorithms.graphIndex import asGraphIndex
+from core_algorithms.instrumentation import recordSolverStats
+from core_algorithms.travelTimeProfiles import DEFAULT_PERIOD
+
+DEFAULT_PROFILE_STEP = 15
+MAX_PROFILE_SAMPLES = 2000
+# Float slack on the FIFO upper bound, so rounding in the potentials never
+# prunes the route the bound was taken from.
+PRUNE_SLACK = 1e-9
+
+
+def parseClockTime(value):
+    # Departure times are numbers in the network's time unit, or "HH:MM"
+    # for networks timed in minutes.
+    if isinstance(value, str) and ':' in value:
+        hours, minutes = value.split(':', 1)
+        hours, minutes = int(hours), float(minutes)
+        if hours < 0 or not 0 <= minutes < 60:
+            raise ValueError(f"Invalid clock time: {value}")
+        return hours * 60 + minutes
+    time = float(value)
+    if time != time or time < 0:
+        raise ValueError(f"Invalid departure time: {value}")
+    return time
+
+
+def runTimeDependentDijkstra(index, source, departure, target=-1, lowerBound=None, upperBound=float('inf')):
+    # Earliest-arrival search. Under FIFO a node reached earlier can never be
+    # overtaken by leaving it later, so every node is settled once at its
+    # earliest arrival, exactly like static Dijkstra. lowerBound(node) turns
+    # it into A* and must never overestimate the remaining travel time;
+    # labels that cannot beat upperBound are never queued.
+    offsets, targets, weights, slotEdges = index.csrLists()
+    profiles = index.profiles
+    edgeProfile = profiles.edgeProfileList() if profiles is not None else None
+
+    arrivals = [float('inf')] * index.numNodes
+    predecessors = [-1] * index.numNodes
+    visited = [False] * index.numNodes
+    arrivals[source] = departure
+
+    priorityQueue = [(departure + (lowerBound(source) if lowerBound else 0), source)]
+    heapPushes = 1
+    nodesSettled = 0
+    labelsPruned = 0
+    factorEvaluations = 0
+
+    while priorityQueue:
+        _, currentNode = heapq.heappop(priorityQueue)
+
+        if visited[currentNode]:
+            continue
+
+        visited[currentNode] = True
+        nodesSettled += 1
+
+        if currentNode == target:
+            break
+
+        currentArrival = arrivals[currentNode]
+        # Every road out of this node is entered at the same time, so each
+        # profile is evaluated at most once per settled node.
+        factors = {}
+
+        for slot in range(offsets[currentNode], offsets[currentNode + 1]):
+            neighbor = targets[slot]
+            if visited[neighbor]:
+                continue
+
+            profile = edgeProfile[slotEdges[slot]] if edgeProfile is not None else -1
+            if profile < 0:
+                arrival = currentArrival + weights[slot]
+            else:
+                factor = factors.get(profile)
+                if factor is None:
+                    factor = factors[profile] = profiles.factorAt(profile, currentArrival)
+                    factorEvaluations += 1
+                arrival = currentArrival + weights[slot] * factor
+
+            if arrival < arrivals[neighbor]:
+                estimate = arrival + (lowerBound(neighbor) if lowerBound else 0)
+                if estimate > upperBound:
+                    labelsPruned += 1
+                    continue
+                arrivals[neighbor] = arrival
+                predecessors[neighbor] = currentNode
+                heapq.heappush(priorityQueue, (estimate, neighbor))
+                heapPushes += 1
+
+    recordSolverStats('timeDependentDijkstra', nodesSettled=nodesSettled, heapPushes=heapPushes, labelsPruned=labelsPruned, factorEvaluations=factorEvaluations)
+    return arrivals, predecessors
+
+
+def runLowerBoundDijkstra(index, target):
+    # Static Dijkstra on each road's fastest possible travel time. The
+    # distances never overestimate time-dependent travel to target and form
+    # a consistent A* potential for every departure time.
+    offsets, targets, _, slotEdges = index.csrLists()
+    if index.profiles is not None:
+        edgeBounds = index.profiles.lowerBoundWeights(index.edgeWeights).tolist()
+        weights = [edgeBounds[edge] for edge in slotEdges]
+    else:
+        weights = index.csrLists()[2]
+
+    distances = [float('inf')] * index.numNodes
+    distances[target] = 0
+    priorityQueue = [(0, target)]
+    visited = [False] * index.numNodes
+
+    while priorityQueue:
+        currentDistance, currentNode = heapq.heappop(priorityQueue)
+        if visited[currentNode]:
+            continue
+        visited[currentNode] = True
+
+        for slot in range(offsets[currentNode], offsets[currentNode + 1]):
+            neighbor = targets[slot]
+            distance = currentDistance + weights[slot]
+            if distance < distances[neighbor]:
+                distances[neighbor] = distance
+                heapq.heappush(priorityQueue, (distance, neighbor))
+
+    return distances
+
+
+def pathArrival(index, path, departure):
+    # Arrival time when following path from departure, taking the fastest
+    # parallel road on each hop.
+    offsets, targets, weights, slotEdges = index.csrLists()
+    profiles = index.profiles
+    arrival = departure
+    for u, v in zip(path, path[1:]):
+        best = float('inf')
+        for slot in range(offsets[u], offsets[u + 1]):
+            if targets[slot] == v:
+                travelTime = profiles.travelTime(slotEdges[slot], weights[slot], arrival) if profiles is not None else weights[slot]
+                best = min(best, travelTime)
+        arrival += best
+    return arrival
+
+
+def rebuildPath(predecessors, target):
+    path = []
+    current = target
+    while current != -1:
+        path.append(current)
+        current = predecessors[current]
+    path.reverse()
+    return path
+
+
+def roundTime(value):
+    value = round(value, 6)
+    return int(value) if value == int(value) else value
+
+
+def formatTimedRoute(index, path, departure, arrival):
+    return {
+        'path': " -> ".join(index.nodeIds[node] for node in path),
+        'departure': roundTime(departure),
+        'arrival': roundTime(arrival),
+        'travelTime': roundTime(arrival - departure),
+    }
+
+
+def solveTimeDependentRoute(graph, startNode, endNode, departure, landmarkRouter=None):
+    # "Depart at T": the fastest route and its arrival time. A landmark
+    # router built for the same graph bounds static distances; scaled by the
+    # smallest profile factor it still never overestimates, so it drives A*.
+    index = asGraphIndex(graph)
+
+    if startNode not in index.nodeIndex or endNode not in index.nodeIndex:
+        return {'path': f"Error: Invalid Node ({startNode} or {endNode})", 'departure': departure, 'arrival': None, 'travelTime': 0}
+
+    source = index.nodeIndex[startNode]
+    target = index.nodeIndex[endNode]
+    lowerBound = None
+    if landmarkRouter is not None:
+        scale = index.profiles.minimumFactor() if index.profiles is not None else 1.0
+        bound = landmarkRouter.boundTo(target)
+        lowerBound = lambda node: scale * bound(node)
+
+    arrivals, predecessors = runTimeDependentDijkstra(index, source, departure, target, lowerBound)
+    if arrivals[target] == float('inf'):
+        return {'path': "No path found.", 'departure': departure, 'arrival': None, 'travelTime': 0}
+    return formatTimedRoute(index, rebuildPath(predecessors, target), departure, arrivals[target])
+
+
+def solveTravelTimeProfile(graph, startNode, endNode, step=DEFAULT_PROFILE_STEP, start=0, end=None):
+    # "Profile over the day": the fastest route for departures every step
+    # time units across the period. The lower-bound potentials are computed
+    # once for the target and shared by every departure. Departures run in
+    # order, and by FIFO the previous route followed from the new departure
+    # is an upper bound that prunes any label unable to beat it.
+    index = asGraphIndex(graph)
+    period = index.profiles.period if index.profiles is not None else float(DEFAULT_PERIOD)
+    end = start + period if end is None else end
+
+    if startNode not in index.nodeIndex or endNode not in index.nodeIndex:
+        return {'error': f"Error: Invalid Node ({startNode} or {endNode})", 'samples': []}
+    if step <= 0 or end <= start:
+        raise ValueError("Profile step must be positive and end must come after start.")
+    if (end - start) / step > MAX_PROFILE_SAMPLES:
+        raise ValueError(f"A profile is limited to {MAX_PROFILE_SAMPLES} departures; use a larger step.")
+
+    source = index.nodeIndex[startNode]
+    target = index.nodeIndex[endNode]
+    potentials = runLowerBoundDijkstra(index, target)
+    if potentials[source] == float('inf'):
+        return {'error': "No path found.", 'samples': []}
+
+    samples = []
+    previousPath = None
+    routeChanges = 0
+    for position in range(math.ceil((end - start) / step)):
+        departure = start + position * step
+        upperBound = float('inf')
+        if previousPath:
+            upperBound = pathArrival(index, previousPath, departure)
+            upperBound += PRUNE_SLACK * max(1.0, abs(upperBound))
+        arrivals, predecessors = runTimeDependentDijkstra(index, source, departure, target, potentials.__getitem__, upperBound)
+        path = rebuildPath(predecessors, target)
+        if previousPath is not None and path != previousPath:
+            routeChanges += 1
+        previousPath = path
+        samples.append(formatTimedRoute(index, path, departure, arrivals[target]))
+
+    fastest = min(samples, key=lambda sample: (sample['travelTime'], sample['departure']))
+    slowest = max(samples, key=lambda sample: (sample['travelTime'], -sample['departure']))
+    return {
+        'error': None,
+        'start': startNode,
+        'end': endNode,
+        'period': roundTime(period),
+        'step': roundTime(step),
+        'samples': samples,
+        'fastest': fastest,
+        'slowest': slowest,
+        'routeChanges': routeChanges,
+    }
@@ -0,0 +1,202 @@
+import bisect
+
+import numpy as np
+
+DEFAULT_PERIOD = 1440
+FIFO_TOLERANCE = 1e-9
+
+# Time-of-day travel-time profiles, stored column-wise. Every distinct shape
+# is a run of (time, factor) breakpoints in the shared times/factors arrays
+# (offsets[s]:offsets[s + 1] is shape s), and each edge only carries the
+# int32 id of its shape, or -1 for a road whose cost never changes. A factor
+# multiplies the edge's static cost, so memory grows with the number of
+# shapes rather than with edges x time slots.
+#
+# In city_network.json the profiles sit beside nodes and edges:
+#
+#   "profiles": {
+#       "period": 1440,
+#       "shapes": {"arterial": [[0, 1.0], [480, 1.8], [600, 1.1], [1080, 1.7]]},
+#       "edges": [["N1", "N2", "arterial"], ...]
+#   }
+#
+# Breakpoint times use the same unit as edge costs and wrap around the
+# period; factors are linearly interpolated between breakpoints.
+
+
+class TravelTimeProfiles:
+    def __init__(self, period, names, offsets, times, factors, edgeProfile):
+        self.period = float(period)
+        self.names = list(names)
+        self.offsets = offsets
+        self.times = times
+        self.factors = factors
+        self.edgeProfile = edgeProfile
+        self._lists = None
+        self._edgeProfileList = None
+
+    @property
+    def numProfiles(self):
+        return len(self.names)
+
+    def arrays(self):
+        return {
+            'profileOffsets': self.offsets,
+            'profileTimes': self.times,
+            'profileFactors': self.factors,
+            'edgeProfile': self.edgeProfile,
+        }
+
+    @classmethod
+    def fromArrays(cls, period, names, arrays):
+        return cls(period, names, arrays['profileOffsets'], arrays['profileTimes'], arrays['profileFactors'], arrays['edgeProfile'])
+
+    def minimumFactors(self):
+        if self.numProfiles == 0:
+            return np.empty(0)
+        return np.minimum.reduceat(np.asarray(self.factors), np.asarray(self.offsets[:-1]))
+
+    def minimumFactor(self):
+        # Static roads count as factor 1, so this never exceeds 1.
+        factors = self.minimumFactors()
+        return min(1.0, float(factors.min())) if len(factors) else 1.0
+
+    def evaluationLists(self):
+        # Per shape: breakpoint times padded by one wrapped point on each side,
+        # their factors, and the slope of every segment, as plain lists for
+        # the search loop.
+        if self._lists is None:
+            lists = []
+            offsets = self.offsets.tolist()
+            times = self.times.tolist()
+            factors = self.factors.tolist()
+            for profile in range(self.numProfiles):
+                start, end = offsets[profile], offsets[profile + 1]
+                shapeTimes = [times[end - 1] - self.period] + times[start:end] + [times[start] + self.period]
+                shapeFactors = [factors[end - 1]] + factors[start:end] + [factors[start]]
+                slopes = [
+                    (shapeFactors[i + 1] - shapeFactors[i]) / (shapeTimes[i + 1] - shapeTimes[i])
+                    for i in range(len(shapeTimes) - 1)
+                ]
+                lists.append((shapeTimes, shapeFactors, slopes))
+            self._lists = lists
+        return self._lists
+
+    def edgeProfileList(self):
+        if self._edgeProfileList is None:
+            # Same rule as graphIndex.scalarView: keep mapped arrays shared.
+            if isinstance(self.edgeProfile, np.memmap):
+                self._edgeProfileList = memoryview(self.edgeProfile)
+            else:
+                self._edgeProfileList = self.edgeProfile.tolist()
+        return self._edgeProfileList
+
+    def factorAt(self, profile, time):
+        times, factors, slopes = self.evaluationLists()[profile]
+        offset = time % self.period
+        position = bisect.bisect_right(times, offset) - 1
+        return factors[position] + slopes[position] * (offset - times[position])
+
+    def travelTime(self, edgeId, cost, departure):
+        profile = self.edgeProfileList()[edgeId]
+        if profile < 0:
+            return cost
+        return cost * self.factorAt(profile, departure)
+
+    def lowerBoundWeights(self, edgeWeights):
+        # Smallest travel time each edge can take at any time of day.
+        bounds = np.asarray(edgeWeights, dtype=np.float64).copy()
+        profiled = np.asarray(self.edgeProfile) >= 0
+        bounds[profiled] *= self.minimumFactors()[np.asarray(self.edgeProfile)[profiled]]
+        return bounds
+
+    def checkFifo(self, index):
+        # Leaving later must never mean arriving earlier: with travel time
+        # cost * f(t), that needs cost * f'(t) >= -1 on every segment. The
+        # time-dependent search relies on it to settle each node once.
+        minimumSlopes = np.array([min(slopes) for _, _, slopes in self.evaluationLists()])
+        profiled = np.flatnonzero(np.asarray(self.edgeProfile) >= 0)
+        if len(profiled) == 0:
+            return
+        edgeSlopes = np.asarray(index.edgeWeights, dtype=np.float64)[profiled] * minimumSlopes[np.asarray(self.edgeProfile)[profiled]]
+        broken = profiled[edgeSlopes < -1 - FIFO_TOLERANCE]
+        if len(broken):
+            u, v, cost = index.edgeTuple(int(broken[0]))
+            name = self.names[int(self.edgeProfile[broken[0]])]
+            raise ValueError(
+                f"Travel-time profile '{name}' drops too fast for road {u}-{v} (cost {cost}): "
+                f"a later departure would arrive earlier. {len(broken)} road(s) affected."
+            )
+
+
+def normalizeShape(name, breakpoints, period):
+    if not isinstance(breakpoints, list) or not breakpoints:
+        raise ValueError(f"Travel-time profile '{name}' needs at least one [time, factor] breakpoint.")
+    try:
+        points = [(float(time), float(factor)) for time, factor in breakpoints]
+    except (TypeError, ValueError):
+        raise ValueError(f"Travel-time profile '{name}' must be a list of [time, factor] pairs.")
+
+    times = [time for time, _ in points]
+    if any(time < 0 or time >= period for time in times):
+        raise ValueError(f"Travel-time profile '{name}' has a breakpoint outside [0, {period:g}).")
+    if any(later <= earlier for earlier, later in zip(times, times[1:])):
+        raise ValueError(f"Travel-time profile '{name}' breakpoint times must be strictly increasing.")
+    if any(factor <= 0 for _, factor in points):
+        raise ValueError(f"Travel-time profile '{name}' factors must be positive.")
+    return points
+
+
+def buildTravelTimeProfiles(index, shapes, assignments, period=DEFAULT_PERIOD):
+    # assignments yields (u, v, shapeName) with u and v as node indices; the
+    # shape applies to every road between the two nodes.
+    period = float(period)
+    if period <= 0:
+        raise ValueError("Travel-time profile period must be positive.")
+
+    names = list(shapes)
+    shapeIds = {name: position for position, name in enumerate(names)}
+    normalized = [normalizeShape(name, shapes[name], period) for name in names]
+
+    offsets = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum([len(points) for points in normalized], out=offsets[1:])
+    times = np.array([time for points in normalized for time, _ in points], dtype=np.float64)
+    factors = np.array([factor for points in normalized for _, factor in points], dtype=np.float64)
+
+    edgeProfile = np.full(index.numEdges, -1, dtype=np.int32)
+    csrOffsets, targets, _, slotEdges = index.csrLists()
+    for u, v, name in assignments:
+        shapeId = shapeIds.get(name)
+        if shapeId is None:
+            raise ValueError(f"Unknown travel-time profile '{name}' for road {index.nodeIds[u]}-{index.nodeIds[v]}.")
+        matched = False
+        for slot in range(csrOffsets[u], csrOffsets[u + 1]):
+            if targets[slot] == v:
+                edgeProfile[slotEdges[slot]] = shapeId
+                matched = True
+        if not matched:
+            raise ValueError(f"Travel-time profile '{name}' names a road that does not exist: {index.nodeIds[u]}-{index.nodeIds[v]}.")
+
+    profiles = TravelTimeProfiles(period, names, offsets, times, factors, edgeProfile)
+    profiles.checkFifo(index)
+    return profiles
+
+
+def parseTravelTimeProfiles(index, spec):
+    if not isinstance(spec, dict):
+        raise ValueError("Expected 'profiles' as an object with 'shapes' and 'edges'.")
+    shapes = spec.get('shapes', {})
+    edges = spec.get('edges', [])
+    if not isinstance(shapes, dict) or not isinstance(edges, list):
+        raise ValueError("Expected 'profiles.shapes' as an object and 'profiles.edges' as a list of [U, V, shape].")
+
+    def assignments():
+        for entry in edges:
+            if not isinstance(entry, list) or len(entry) != 3:
+                raise ValueError("Expected each profiled road as [U, V, shape].")
+            u, v, name = entry
+            if u not in index.nodeIndex or v not in index.nodeIndex:
+                raise ValueError(f"Travel-time profile '{name}' names an unknown node ({u} or {v}).")
+            yield index.nodeIndex[u], index.nodeIndex[v], name
+
+    return buildTravelTimeProfiles(index, shapes, assignments(), spec.get('period', DEFAULT_PERIOD))
@@ -0,0 +1,163 @@
+import numpy as np
+
+from core_algorithms.convexHullBuilder import runMonotoneChain
+from core_algorithms.instrumentation import recordSolverStats
+
+QUERY_CHUNK_SIZE = 1 << 20
+
+
+def asPointArray(points):
+    if len(points) and isinstance(points[0], dict):
+        return np.array([(point['x'], point['y']) for point in points], dtype=np.float64).reshape(-1, 2)
+    array = np.asarray(points, dtype=np.float64)
+    if array.size and (array.ndim != 2 or array.shape[1] != 2):
+        raise ValueError("Expected points as [x, y] pairs.")
+    return array.reshape(-1, 2)
+
+
+def computeRaggedPolygonAreas(vertices, offsets):
+    # Shoelace over every polygon at once: each vertex is paired with the
+    # next one in its own ring, and reduceat sums the terms per polygon.
+    counts = np.diff(offsets)
+    areas = np.zeros(len(counts))
+    if len(vertices) == 0:
+        return areas
+
+    following = np.arange(1, len(vertices) + 1)
+    nonEmpty = counts > 0
+    following[offsets[1:][nonEmpty] - 1] = offsets[:-1][nonEmpty]
+    terms = vertices[:, 0] * vertices[following, 1] - vertices[following, 0] * vertices[:, 1]
+
+    sums = np.add.reduceat(terms, offsets[:-1][nonEmpty])
+    areas[nonEmpty] = np.abs(sums) / 2.0
+    areas[counts < 3] = 0.0
+    return areas
+
+
+class ZoneHullSet:
+    # Hulls for many named zones packed into flat arrays: vertices[offsets[z]:
+    # offsets[z + 1]] is zone z's hull, counter-clockwise. Membership tests run
+    # on precomputed edge arrays behind a bounding-box prefilter.
+
+    def __init__(self, names, vertices, offsets, vertexNames=None):
+        self.names = list(names)
+        self.vertices = vertices
+        self.offsets = offsets
+        self.vertexNames = vertexNames
+        self.areas = computeRaggedPolygonAreas(vertices, offsets)
+
+        counts = np.diff(offsets)
+        self.valid = counts >= 3
+        self.boxes = np.full((len(self.names), 4), np.nan)
+        for zone in np.flatnonzero(counts > 0).tolist():
+            ring = vertices[offsets[zone]:offsets[zone + 1]]
+            self.boxes[zone] = (ring[:, 0].min(), ring[:, 1].min(), ring[:, 0].max(), ring[:, 1].max())
+
+        following = np.arange(1, len(vertices) + 1)
+        following[offsets[1:][counts > 0] - 1] = offsets[:-1][counts > 0]
+        self.edgeStarts = vertices
+        self.edgeVectors = vertices[following] - vertices if len(vertices) else np.empty((0, 2))
+
+    def __len__(self):
+        return len(self.names)
+
+    def hull(self, zone):
+        return self.vertices[self.offsets[zone]:self.offsets[zone + 1]]
+
+    def _membershipChunk(self, queries, queryOffset, zoneIndices, queryIndices):
+        order = np.argsort(queries[:, 0], kind='stable')
+        sortedX = queries[order, 0]
+        comparisons = 0
+
+        for zone in np.flatnonzero(self.valid).tolist():
+            minX, minY, maxX, maxY = self.boxes[zone]
+            # Queries sorted by x turn the box's x-range into one slice; the
+            # y-range then trims it before any edge is tested.
+            low = np.searchsorted(sortedX, minX, side='left')
+            high = np.searchsorted(sortedX, maxX, side='right')
+            candidates = order[low:high]
+            if len(candidates) == 0:
+                continue
+            candidateY = queries[candidates, 1]
+            candidates = candidates[(candidateY >= minY) & (candidateY <= maxY)]
+
+            start, end = self.offsets[zone], self.offsets[zone + 1]
+            for edge in range(start, end):
+                if len(candidates) == 0:
+                    break
+                comparisons += len(candidates)
+                origin = self.edgeStarts[edge]
+                vector = self.edgeVectors[edge]
+                cross = vector[0] * (queries[candidates, 1] - origin[1]) - vector[1] * (queries[candidates, 0] - origin[0])
+                candidates = candidates[cross >= 0]
+
+            if len(candidates):
+                zoneIndices.append(np.full(len(candidates), zone, dtype=np.int64))
+                queryIndices.append(candidates + queryOffset)
+
+        return comparisons
+
+    def membership(self, queryPoints, chunkSize=QUERY_CHUNK_SIZE):
+        # Every (query, zone) pair where the query lies inside or on the
+        # zone's hull, sorted by query index; overlapping zones all count.
+        queries = asPointArray(queryPoints)
+        zoneIndices = []
+        queryIndices = []
+        comparisons = 0
+        for chunkStart in range(0, len(queries), chunkSize):
+            comparisons += self._membershipChunk(queries[chunkStart:chunkStart + chunkSize], chunkStart, zoneIndices, queryIndices)
+
+        recordSolverStats('zoneMembership', queries=len(queries), zones=len(self.names), edgeTests=comparisons)
+        if not zoneIndices:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        queryIndex = np.concatenate(queryIndices)
+        zoneIndex = np.concatenate(zoneIndices)
+        order = np.lexsort((zoneIndex, queryIndex))
+        return queryIndex[order], zoneIndex[order]
+
+    @staticmethod
+    def firstZones(numQueries, queryIndex, zoneIndex):
+        located = np.full(numQueries, -1, dtype=np.int64)
+        if len(queryIndex):
+            first = np.ones(len(queryIndex), dtype=bool)
+            first[1:] = queryIndex[1:] != queryIndex[:-1]
+            located[queryIndex[first]] = zoneIndex[first]
+        return located
+
+    def locate(self, queryPoints, chunkSize=QUERY_CHUNK_SIZE):
+        # The lowest-numbered zone containing each query, or -1.
+        queries = asPointArray(queryPoints)
+        return self.firstZones(len(queries), *self.membership(queries, chunkSize))
+
+    def countMembers(self, queryPoints, chunkSize=QUERY_CHUNK_SIZE):
+        _, zoneIndex = self.membership(queryPoints, chunkSize)
+        return np.bincount(zoneIndex, minlength=len(self.names))
+
+    def locateAndCount(self, queryPoints, chunkSize=QUERY_CHUNK_SIZE):
+        # locate() and countMembers() from a single membership pass.
+        queries = asPointArray(queryPoints)
+        queryIndex, zoneIndex = self.membership(queries, chunkSize)
+        return self.firstZones(len(queries), queryIndex, zoneIndex), np.bincount(zoneIndex, minlength=len(self.names))
+
+
+def buildZoneHulls(groups):
+    # groups maps a zone name to its points, given as [x, y] pairs, an (n, 2)
+    # array, or coordinate records with 'x', 'y' and optionally 'name'.
+    names = list(groups)
+    rings = []
+    ringNames = []
+    for name in names:
+        points = groups[name]
+        pointArray = asPointArray(points)
+        hullIndices = runMonotoneChain(pointArray) if len(pointArray) else []
+        rings.append(pointArray[hullIndices] if hullIndices else np.empty((0, 2)))
+        if len(points) and isinstance(points[0], dict):
+            ringNames.append([points[i].get('name') for i in hullIndices])
+        else:
+            ringNames.append(None)
+
+    offsets = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum([len(ring) for ring in rings], out=offsets[1:])
+    vertices = np.vstack(rings) if rings else np.empty((0, 2))
+    return ZoneHullSet(names, vertices, offsets, ringNames)
@@ -0,0 +1,115 @@
+import gzip
+import hashlib
+import re
+import threading
+
+from flask import Response, render_template, request
+from markupsafe import Markup
+
+from core_algorithms.instrumentation import stage
+
+# The dashboard is one static page with a slot per feature result. The
+# static part is rendered once per dataset version and split at the slots;
+# a POST only renders the fragment for its own result and splices it in.
+
+RESULT_SLOTS = (
+    ('dijkstraResult', 'dijkstraResult', 'results/dijkstra.html'),
+    ('knapsackResult', 'knapsackResult', 'results/knapsack.html'),
+    ('mstResult', 'mstResult', 'results/mst.html'),
+    ('hullStatus', 'hullResult', 'results/hullStatus.html'),
+    ('hullResult', 'hullResult', 'results/hull.html'),
+    ('sensorResult', 'sensorResult', 'results/sensors.html'),
+    ('proximityResult', 'proximityResult', 'results/proximity.html'),
+)
+SLOT_MARKER = re.compile(r'\x00(\w+)\x00')
+GZIP_MIN_BYTES = 512
+
+
+def buildStaticContext(dataset):
+    return {
+        'networkNodes': dataset.networkNodes,
+        'all_network_edges': dataset.formattedEdges,
+        'emergency_points': dataset.emergencyPoints,
+        'underserved_points': dataset.underservedPoints,
+    }
+
+
+class PageShell:
+    def __init__(self, key, pieces, slotNames, defaults):
+        self.key = key
+        self.pieces = pieces
+        self.slotNames = slotNames
+        self.defaults = defaults
+        self.page = self.render({}).encode()
+        self.compressedPage = gzip.compress(self.page)
+        self.etag = hashlib.sha1(self.page).hexdigest()
+
+    def render(self, fragments):
+        parts = [self.pieces[0]]
+        for slotName, piece in zip(self.slotNames, self.pieces[1:]):
+            parts.append(fragments.get(slotName, self.defaults[slotName]))
+            parts.append(piece)
+        return ''.join(parts)
+
+
+def buildPageShell(dataset, key):
+    markers = {slotName: Markup(f"\x00{slotName}\x00") for slotName, _, _ in RESULT_SLOTS}
+    html = render_template('index.html', slots=markers, **buildStaticContext(dataset))
+
+    split = SLOT_MARKER.split(html)
+    pieces, slotNames = split[0::2], split[1::2]
+    missing = set(markers) - set(slotNames)
+    if missing:
+        raise ValueError(f"index.html is missing result slots: {', '.join(sorted(missing))}")
+
+    # Empty slots still render: the hull status line reads 'Ready.' when
+    # there is no hull result.
+    defaults = {slotName: render_template(template, **{resultKey: None}) for slotName, resultKey, template in RESULT_SLOTS}
+    return PageShell(key, pieces, slotNames, defaults)
+
+
+_shell = None
+_shellLock = threading.Lock()
+
+
+def getPageShell(dataset):
+    # Keyed on the dataset version and the script root, since url_for bakes
+    # the mount point into the static links.
+    global _shell
+    key = (dataset.version, dataset.contentHash, request.script_root)
+    shell = _shell
+    if shell is not None and shell.key == key:
+        return shell
+    with _shellLock:
+        if _shell is None or _shell.key != key:
+            _shell = buildPageShell(dataset, key)
+        return _shell
+
+
+def renderResultPage(dataset, activeResultKey=None, activeResultValue=None):
+    with stage('context'):
+        shell = getPageShell(dataset)
+    with stage('render'):
+        fragments = {}
+        if activeResultKey:
+            for slotName, resultKey, template in RESULT_SLOTS:
+                if resultKey == activeResultKey:
+                    fragments[slotName] = render_template(template, **{resultKey: activeResultValue})
+        return shell.render(fragments)
+
+
+def homePageResponse(dataset):
+    with stage('context'):
+        shell = getPageShell(dataset)
+
+    # Weak, because the gzip and identity pages share the validator.
+    response = Response(status=304) if request.if_none_match.contains_weak(shell.etag) else None
+    if response is None:
+        response = Response(shell.page, mimetype='text/html')
+        if len(shell.page) >= GZIP_MIN_BYTES and 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response.set_data(shell.compressedPage)
+            response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(shell.etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
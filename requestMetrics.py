@@ -0,0 +1,91 @@
+import cProfile
+import io
+import os
+import pstats
+import time
+
+from flask import Response, g, jsonify, request
+
+from core_algorithms.datasetStore import getDatasetStore
+from core_algorithms.instrumentation import beginTrace, endTrace, registry
+from core_algorithms.lazyImports import lazyModule
+from core_algorithms.resultCache import getResultCache
+
+jobQueue = lazyModule('core_algorithms.jobQueue')
+shortestPath = lazyModule('core_algorithms.shortestPath')
+
+PROFILING_ENV = 'URBAN_PLANNER_PROFILING'
+PROFILE_ROWS = 30
+
+
+def profilingAllowed():
+    # Opt-in: profiles expose internal paths and slow the request down.
+    return os.environ.get(PROFILING_ENV) == '1'
+
+
+def readCacheGauges():
+    stats = getResultCache().stats()
+    return [((('cache', 'result'), ('kind', kind)), stats[kind]) for kind in ('hits', 'diskHits', 'misses', 'entries')] + [
+        ((('cache', 'shortestPathTree'), ('kind', 'hits')), shortestPath.treeCache.hits),
+        ((('cache', 'shortestPathTree'), ('kind', 'misses')), shortestPath.treeCache.misses),
+    ]
+
+
+def readJobGauges():
+    counts = {}
+    for job in jobQueue.getJobQueue().listJobs():
+        counts[job['status']] = counts.get(job['status'], 0) + 1
+    return [((('status', status),), count) for status, count in sorted(counts.items())]
+
+
+def summarizeProfile(profiler):
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(PROFILE_ROWS)
+    return stream.getvalue()
+
+
+def installInstrumentation(app):
+    registry.registerGauge('urban_planner_cache_events', readCacheGauges, "Result and shortest-path-tree cache counters.")
+    registry.registerGauge('urban_planner_jobs', readJobGauges, "Background jobs by status.")
+    registry.registerGauge('urban_planner_dataset_version', lambda: getDatasetStore().get().version, "Dataset snapshot version served.")
+
+    @app.before_request
+    def startRequestTrace():
+        g.requestStartedAt = time.perf_counter()
+        beginTrace()
+        g.profiler = None
+        if request.args.get('profile') == '1' and profilingAllowed():
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def finishRequestTrace(response):
+        profiler = g.get('profiler')
+        if profiler is not None:
+            profiler.disable()
+
+        endpoint = request.endpoint or 'unknown'
+        if 'requestStartedAt' in g:
+            registry.observe('urban_planner_request_seconds', time.perf_counter() - g.requestStartedAt, endpoint=endpoint)
+        registry.increment('urban_planner_requests_total', endpoint=endpoint, status=response.status_code)
+
+        trace = endTrace()
+        if profiler is None or trace is None:
+            return response
+
+        # Profiling swaps the page or JSON body for the timing report.
+        return jsonify({
+            'endpoint': endpoint,
+            'status': response.status_code,
+            'trace': trace.toDict(),
+            'profile': summarizeProfile(profiler),
+        })
+
+    @app.teardown_request
+    def dropRequestTrace(error=None):
+        endTrace()
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
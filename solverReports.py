@@ -0,0 +1,43 @@
+from core_algorithms.lazyImports import lazyModule
+from core_algorithms.resultCache import getResultCache
+
+closestPairSolver = lazyModule('core_algorithms.closestPairSolver')
+convexHullBuilder = lazyModule('core_algorithms.convexHullBuilder')
+mstBuilder = lazyModule('core_algorithms.mstBuilder')
+nQueenPlacement = lazyModule('core_algorithms.nQueenPlacement')
+shortestPath = lazyModule('core_algorithms.shortestPath')
+
+# Solver results shared by the dashboard pages and the JSON API, with the
+# input limits both of them enforce.
+
+MAX_SENSOR_GRID = 64
+MAX_SENSOR_COUNT_N = 14
+
+
+def routeBetween(dataset, startNode, endNode):
+    if dataset.landmarkRouter is not None:
+        return dataset.landmarkRouter.solve(startNode, endNode)
+    return shortestPath.solveDijkstra(dataset.graphIndex, startNode, endNode)
+
+
+def computeProximityReport(dataset):
+    result = closestPairSolver.findClosestPair(dataset.emergencyPoints, dataset.proximityIndex)
+    result['underservedMatches'] = dataset.underservedMatches
+    return result
+
+
+def proximityReport(dataset):
+    return getResultCache().getOrCompute('proximity', dataset.contentHash, (), lambda: computeProximityReport(dataset))
+
+
+def mstReport(dataset):
+    return getResultCache().getOrCompute('mst', dataset.contentHash, (), lambda: mstBuilder.buildMST(dataset.graphIndex))
+
+
+def hullReport(dataset):
+    return getResultCache().getOrCompute('hull', dataset.contentHash, (), lambda: convexHullBuilder.buildConvexHull(dataset.coordinates))
+
+
+def sensorReport(n, countSolutions):
+    # Placements depend only on N, so they are cached outside any dataset.
+    return getResultCache().getOrCompute('sensors', '', (n, countSolutions), lambda: nQueenPlacement.findSensorPlacement(n, countSolutions))